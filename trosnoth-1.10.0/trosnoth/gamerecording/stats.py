@@ -1,5 +1,6 @@
 from collections import defaultdict
 import datetime
+import functools
 import json
 import logging
 import os
@@ -13,11 +14,38 @@ from trosnoth.utils.utils import timeNow    # TODO: use game not real time
 log = logging.getLogger(__name__)
 
 
+def _saveWithAttrs(record, attrs):
+    '''
+    The Django ORM seems to store the ID of foreign key relationships when
+    the attribute is first set, so if you set the relationship before the
+    related object is first saved, saving will break. Getting and setting
+    again just before the save is good enough to make Django happy.
+    '''
+    for attr in attrs:
+        setattr(record, attr, getattr(record, attr))
+    record.save()
+
+
 # TODO: test the accuracy etc. achievements after fixing the stats to fit the
 # event-based architecture
 
 class PlayerStatKeeper(object):
     '''Maintains the statistics for a particular player object'''
+
+    # One of these exists for every player who has joined the game, so avoid
+    # the overhead of a per-instance __dict__. __weakref__ is needed because
+    # Event listeners hold weak references to bound methods.
+    __slots__ = (
+        'gameRecorder', 'player',
+        'kills', 'deaths', 'zoneTags', 'zoneAssists', 'shotsFired',
+        'shotsHit', 'coinsEarned', 'coinsUsed', 'coinsLost', 'roundsWon',
+        'roundsLost', 'playerKills', 'playerDeaths', 'upgradesUsed',
+        'timeAlive', 'timeDead', 'killStreak', 'currentKillStreak',
+        'tagStreak', 'currentTagStreak', 'aliveStreak', 'lastTimeRespawned',
+        'lastTimeDied', 'lastTimeSaved',
+        '__weakref__',
+    )
+
     def __init__(self, gameRecorder, player):
         self.gameRecorder = gameRecorder
         self.player = player
@@ -99,17 +127,19 @@ class PlayerStatKeeper(object):
         self.gameRecorder.game.achievementManager.triggerAchievement(
             self.player, achievementId)
 
-    def _updateStreaks(self, updateAlive):
+    def _updateStreaks(self, updateAlive, time=None):
         '''
         updateAlive will be set to True in three situations:
           1. if the player has just died
           2. if the player was alive when the game ended
           3. if the player was alive when they disconnected
-        '''
-        self.killStreak = max(self.killStreak, self.currentKillStreak)
-        self.tagStreak = max(self.tagStreak, self.currentTagStreak)
 
-        time = timeNow()
+        time may be passed in by callers which have already read the clock.
+        '''
+        # killStreak and tagStreak are kept up to date by killed() and
+        # zoneTagged(), so only the current streaks need resetting here.
+        if time is None:
+            time = timeNow()
 
         if updateAlive and self.lastTimeRespawned:
             lastLife = time - self.lastTimeRespawned
@@ -130,7 +160,7 @@ class PlayerStatKeeper(object):
 
         time = timeNow()
 
-        self._updateStreaks(True)
+        self._updateStreaks(True, time)
 
         self.lastTimeDied = time
 
@@ -167,13 +197,15 @@ class PlayerStatKeeper(object):
         self.playerKills[victim] += 1
         self.currentKillStreak += 1
 
-        self.killStreak = max(self.killStreak, self.currentKillStreak)
+        if self.currentKillStreak > self.killStreak:
+            self.killStreak = self.currentKillStreak
 
     def zoneTagged(self):
         self.zoneTags += 1
         self.currentTagStreak += 1
 
-        self.tagStreak = max(self.tagStreak, self.currentTagStreak)
+        if self.currentTagStreak > self.tagStreak:
+            self.tagStreak = self.currentTagStreak
 
     def tagAssist(self):
         self.zoneAssists += 1
@@ -230,10 +262,8 @@ class PlayerStatKeeper(object):
                 else None)
         stats['coinsWasted'] = self.coinsLost - self.coinsUsed
 
-        # We've stored these dicts as player objects (meaning rejoins may be
-        # credited in two places)
-        # Here, we combine them by aggregating on player nick (which should be
-        # the same)
+        # These dicts are keyed by player object, but entries for a player who
+        # rejoined have already been merged by otherPlayerRejoined()
         for attribute in 'playerKills', 'playerDeaths':
             dictionary = getattr(self, attribute)
             newDict = {}
@@ -248,6 +278,15 @@ class PlayerStatKeeper(object):
     def rejoined(self, player):
         self.player = player
 
+    def otherPlayerRejoined(self, oldPlayer, newPlayer):
+        '''
+        Merges any kills or deaths recorded against oldPlayer into newPlayer
+        so that each opponent only has one entry.
+        '''
+        for dictionary in self.playerKills, self.playerDeaths:
+            if oldPlayer in dictionary:
+                dictionary[newPlayer] += dictionary.pop(oldPlayer)
+
 
 class StatKeeper(object):
 
@@ -310,12 +349,16 @@ class StatKeeper(object):
                 self.playerStatList[assistant.id].tagAssist()
 
     def playerAdded(self, player):
-        statkeeper = self.allPlayerStatLists.get(player.identifyingName)
-        if statkeeper:
-            statkeeper.rejoined(player)
-        else:
+        try:
+            statkeeper = self.allPlayerStatLists[player.identifyingName]
+        except KeyError:
             statkeeper = PlayerStatKeeper(self.gameRecorder, player)
             self.allPlayerStatLists[player.identifyingName] = statkeeper
+        else:
+            oldPlayer = statkeeper.player
+            statkeeper.rejoined(player)
+            for otherStats in self.allPlayerStatLists.itervalues():
+                otherStats.otherPlayerRejoined(oldPlayer, player)
         self.playerStatList[player.id] = statkeeper
 
     def playerRemoved(self, player, oldId):
@@ -371,6 +414,8 @@ class ServerGameStats(object):
         dbqueue.add(self.gameRecord.save)
 
         playerRecords = {}
+        upgradeRecords = []
+        pendingKills = []
         for playerStat in self.statKeeper.allPlayerStatLists.itervalues():
             player = playerStat.player
             if player.user:
@@ -403,50 +448,41 @@ class ServerGameStats(object):
                 tagStreak=playerStat.tagStreak,
                 aliveStreak=playerStat.aliveStreak,
             )
-            self.queueSaveWithAttrs(record, ['game'])
+            # GamePlayer records are saved one at a time because bulk_create()
+            # does not set primary keys on SQLite, and the records below need
+            # them.
+            dbqueue.add(functools.partial(_saveWithAttrs, record, ['game']))
             playerRecords[player.identifyingName] = record
 
             for upgradeType, count in playerStat.upgradesUsed.iteritems():
-                upgradeRecord = UpgradesUsedInGameRecord(
+                upgradeRecords.append(UpgradesUsedInGameRecord(
                     gamePlayer=record,
                     upgrade=upgradeType,
                     count=count,
-                )
-                self.queueSaveWithAttrs(upgradeRecord, ['gamePlayer'])
+                ))
 
-        for playerStat in self.statKeeper.allPlayerStatLists.itervalues():
-            killeeRecord = playerRecords[playerStat.player.identifyingName]
-            killEntries = {}
+            # Killer records are resolved once all GamePlayers exist.
             for killer, count in playerStat.playerDeaths.iteritems():
-                if killer:
-                    killerRecord = playerRecords[killer.identifyingName]
-                else:
-                    killerRecord = None
-
-                if killer in killEntries:
-                    # Same killer after disconnect / reconnect
-                    killRecord = killEntries[killer]
-                else:
-                    killRecord = PlayerKills(
-                        killer=killerRecord,
-                        killee=killeeRecord,
-                    )
-                    killEntries[killer] = killRecord
-
-                killRecord.count += count
-
-            for killRecord in killEntries.itervalues():
-                self.queueSaveWithAttrs(killRecord, ['killee', 'killer'])
-
-    def queueSaveWithAttrs(self, record, attrs):
-        '''
-        The Django ORM seems to store the ID of foreign key relationships when
-        the attribute is first set, so if you set the relationship before the
-        related object is first saved, saving will break. Getting and setting
-        again just before the save is good enough to make Django happy.
-        '''
+                killerName = killer.identifyingName if killer else None
+                pendingKills.append((record, killerName, count))
+
+        # Rejoins have been merged by StatKeeper, so there is at most one
+        # entry per killer for each player.
+        killRecords = [
+            PlayerKills(
+                killer=playerRecords[killerName] if killerName else None,
+                killee=killeeRecord,
+                count=count,
+            ) for killeeRecord, killerName, count in pendingKills]
+
         @dbqueue.add
-        def saveEndOfGameStats():
-            for attr in attrs:
-                setattr(record, attr, getattr(record, attr))
-            record.save()
+        def saveGamePlayerDetails():
+            # See _saveWithAttrs() for why the foreign keys are reassigned.
+            for upgradeRecord in upgradeRecords:
+                upgradeRecord.gamePlayer = upgradeRecord.gamePlayer
+            UpgradesUsedInGameRecord.objects.bulk_create(upgradeRecords)
+
+            for killRecord in killRecords:
+                killRecord.killee = killRecord.killee
+                killRecord.killer = killRecord.killer
+            PlayerKills.objects.bulk_create(killRecords)
@@ -29,12 +29,19 @@ NO_MORE_MUSIC = 234
 
 pygame.mixer.music.set_endevent(NO_MORE_MUSIC)
 
+# pygame.init() is called before the MusicManager is created, so the mixer
+# settings must be given here. A larger buffer than pygame's default avoids
+# audio dropouts when the game loop is busy, at the cost of ~50ms latency.
+MIXER_FREQUENCY = 44100
+MIXER_BUFFER_SIZE = 2048
+pygame.mixer.pre_init(MIXER_FREQUENCY, -16, 2, MIXER_BUFFER_SIZE)
+
 class MusicManager(object):
     '''Manages the music.'''
 
     def __init__(self):
         try:
-            pygame.mixer.init(44100)
+            pygame.mixer.init(MIXER_FREQUENCY, -16, 2, MIXER_BUFFER_SIZE)
         except:
             log.error('Could not initialise audio.')
         self.index = 0
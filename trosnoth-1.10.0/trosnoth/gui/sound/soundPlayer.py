@@ -4,19 +4,25 @@ from trosnoth.data import getPath
 
 
 class SoundAction(object):
-    def __init__(self, filename, channel):
+    __slots__ = ('channel', '_masterVolume', 'sound')
+
+    def __init__(self, filename, channel, masterVolume=None):
         self.channel = channel
+        # A one-element list shared with the SoundPlayer, so that changing
+        # the master volume does not require touching every SoundAction.
+        if masterVolume is None:
+            masterVolume = [1]
+        self._masterVolume = masterVolume
         if not pygame.mixer.get_init():
             return
 
         self.sound = pygame.mixer.Sound(getPath(sound, filename))
-        self.channelVolume = 1
 
     def play(self, volume=1):
         if not pygame.mixer.get_init():
             return
 
-        finalVol = volume * self.channelVolume
+        finalVol = volume * self._masterVolume[0]
         if finalVol < 0.01:
             return
 
@@ -31,16 +37,17 @@ class SoundAction(object):
     def setVolume(self, val):
         self.sound.set_volume(val)
 
-    def setChannelsVolume(self, val):
-        self.channelVolume = val
-
 
 class SoundPlayer(object):
     def __init__(self):
         self.sounds = {}
-        self.masterVolume = 1
+        self._masterVolume = [1]
         self._reservedChannels = 0
-        pygame.mixer.set_num_channels(16)        
+        pygame.mixer.set_num_channels(16)
+
+    @property
+    def masterVolume(self):
+        return self._masterVolume[0]
 
     def addSound(self, filename, action, channel=None):
         if not pygame.mixer.get_init():
@@ -50,10 +57,8 @@ class SoundPlayer(object):
             self._reservedChannels = channel + 1
             pygame.mixer.set_reserved(self._reservedChannels)
 
-        self.sounds[action] = SoundAction(filename, channel)
-
-        # In case a sound is added after the volume has been set:
-        self.sounds[action].setChannelsVolume(self.masterVolume)
+        self.sounds[action] = SoundAction(
+            filename, channel, self._masterVolume)
 
     def play(self, action, volume=1):
         if not pygame.mixer.get_init():
@@ -71,6 +76,4 @@ class SoundPlayer(object):
         self.sounds[action].setVolume(val)
 
     def setMasterVolume(self, val):
-        self.masterVolume = val
-        for action in self.sounds.values():
-            action.setChannelsVolume(val)
+        self._masterVolume[0] = val
@@ -1,3 +1,4 @@
+from collections import Counter
 import logging
 import random
 
@@ -19,6 +20,9 @@ from trosnoth.triggers.lobby import (
 
 log = logging.getLogger(__name__)
 
+# Sound filenames are a small fixed set, so their encoded forms are kept.
+_encodedSoundFilenames = {}
+
 
 def preferredTeamOtherwiseSmallest(preferredTeam, universe):
     if preferredTeam is not None:
@@ -26,11 +30,11 @@ def preferredTeamOtherwiseSmallest(preferredTeam, universe):
     else:
         playerCounts = universe.getTeamPlayerCounts()
 
-        minCount = len(universe.players) + 1
+        minCount = None
         minTeams = []
         for team in universe.teams:
             count = playerCounts.get(team.id, 0)
-            if count < minCount:
+            if minCount is None or count < minCount:
                 minCount = count
                 minTeams = [team]
             elif count == minCount:
@@ -70,12 +74,15 @@ class Level(object):
         Called when a new level is selected, or the server terminates. This
         could be used to tear down event handlers which have been set up.
         '''
+        # Deactivating a trigger could conceivably activate another, so keep
+        # going until nothing is left.
         while self.activeTriggers:
-            trigger = self.activeTriggers.pop()
-            try:
-                trigger.deactivate()
-            except Exception:
-                log.exception('Error tearing down %s', trigger)
+            triggers, self.activeTriggers = self.activeTriggers, set()
+            for trigger in triggers:
+                try:
+                    trigger.deactivate()
+                except Exception:
+                    log.exception('Error tearing down %s', trigger)
 
     def start(self):
         '''
@@ -148,7 +155,6 @@ class Level(object):
         '''
         self.world.stopCurrentLevel()
 
-    @defer.inlineCallbacks
     def addBot(self, game, team, nick, botName='puppet'):
         '''
         Utility function that adds a bot to the game, but bypasses the call
@@ -156,26 +162,32 @@ class Level(object):
         requested the join. By default, creates a PuppetBot which does
         nothing until told.
         '''
-        bot = yield game.addBot(botName, team=team, fromLevel=True, nick=nick)
-        if bot.player is None:
-            yield bot.onPlayerSet.wait()
+        def gotBot(bot):
+            if bot.player is None:
+                return bot.onPlayerSet.wait().addCallback(lambda _: bot.ai)
+            return bot.ai
 
-        defer.returnValue(bot.ai)
+        d = game.addBot(botName, team=team, fromLevel=True, nick=nick)
+        d.addCallback(gotBot)
+        return d
 
-    @defer.inlineCallbacks
     def waitForHumans(self, number):
         '''
         Utility function that waits until at least number human players have
         joined the game, then returns a collection of the human players in
         the game.
         '''
-        while True:
-            humans = [p for p in self.world.players if not p.bot]
-            if len(humans) >= number:
-                defer.returnValue(humans)
+        if len(self.world.humanPlayers) >= number:
+            return defer.succeed(list(self.world.humanPlayers))
+        return self._waitForMoreHumans(number)
 
+    @defer.inlineCallbacks
+    def _waitForMoreHumans(self, number):
+        while len(self.world.humanPlayers) < number:
             yield self.world.onPlayerAdded.wait()
 
+        defer.returnValue(list(self.world.humanPlayers))
+
     def sendPrivateChat(self, fromPlayer, toPlayer, text):
         fromPlayer.agent.sendRequest(
             ChatMsg(PRIVATE_CHAT, toPlayer.id, text=text.encode()))
@@ -185,7 +197,12 @@ class Level(object):
         Utility function to play a sound on all clients. The sound file must
         exist on the client system.
         '''
-        self.world.sendServerCommand(PlaySoundMsg(filename.encode('utf-8')))
+        try:
+            encoded = _encodedSoundFilenames[filename]
+        except KeyError:
+            encoded = _encodedSoundFilenames[filename] = filename.encode(
+                'utf-8')
+        self.world.sendServerCommand(PlaySoundMsg(encoded))
 
     def setUserInfo(self, userTitle, userInfo, botGoal):
         '''
@@ -281,21 +298,17 @@ class RandomLayoutHelper(object):
         # Calculates a new map size based on what players vote for, with the
         # defaults (if most people select Auto) being determined by the size of
         # the teams.
-        sizeCount = {}
-        for player in self.world.players:
-            if player.bot:
-                continue
-            size = player.preferredSize
-            sizeCount[size] = sizeCount.get(size, 0) + 1
+        humans = self.world.humanPlayers
+        sizeCount = Counter(p.preferredSize for p in humans)
 
         if sizeCount:
-            bestSize = max(sizeCount, key=sizeCount.get)
-            if sizeCount.get((0, 0), 0) != sizeCount[bestSize]:
+            [(bestSize, bestCount)] = sizeCount.most_common(1)
+            if sizeCount[(0, 0)] != bestCount:
                 self.halfMapWidth, self.mapHeight = bestSize
                 return
 
         # Decide size based on player count.
-        teamSize = sum(1 for p in self.world.players if not p.bot)
+        teamSize = len(humans)
 
         if teamSize <= 3:
             self.halfMapWidth, self.mapHeight = (1, 1)
@@ -323,16 +336,12 @@ class RandomLayoutHelper(object):
         if self.duration is not None:
             return
 
-        durationCount = {}
-        for player in self.world.players:
-            if player.bot:
-                continue
-            duration = player.preferredDuration
-            durationCount[duration] = durationCount.get(duration, 0) + 1
+        durationCount = Counter(
+            p.preferredDuration for p in self.world.humanPlayers)
 
         if durationCount:
-            bestDuration = max(durationCount, key=durationCount.get)
-            if durationCount.get(0, 0) != durationCount[bestDuration]:
+            [(bestDuration, bestCount)] = durationCount.most_common(1)
+            if durationCount[0] != bestCount:
                 self.duration = bestDuration
                 return
 
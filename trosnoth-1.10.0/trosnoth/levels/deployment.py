@@ -1,3 +1,4 @@
+from collections import deque
 import random
 
 from trosnoth.levels.base import playLevel
@@ -12,39 +13,39 @@ class DeploymentLevel(StandardLevel):
         blockRatio = 0.8
 
         zones = ZoneLayout(symmetryEnforced=True)
+        rand = random.random
 
         def addColumn(startLocation, columnHeight, previousHeight):
             if not zones.hasZoneAt(startLocation):
                 zones.addZoneAt(startLocation)
 
-            current = startLocation
-            connections = []
+            # Each location in the column is only calculated once.
+            column = [startLocation]
+            connections = deque()
             for i in range(columnHeight - 1):
+                current = column[-1]
                 nextLocation = current + ZoneStep.SOUTH
                 zones.addZoneAt(nextLocation)
                 connections.append((current, ZoneStep.SOUTH))
-                current = nextLocation
+                column.append(nextLocation)
 
             if previousHeight:
                 if previousHeight < columnHeight:
                     assert previousHeight == columnHeight - 1
                     connections.append((startLocation, ZoneStep.SOUTHWEST))
-                    connections.append((current, ZoneStep.NORTHWEST))
-                    current = startLocation + ZoneStep.SOUTH
-                    count = previousHeight - 1
+                    connections.append((column[-1], ZoneStep.NORTHWEST))
+                    middle = column[1:previousHeight]
                 else:
                     assert previousHeight == columnHeight + 1
-                    current = startLocation
-                    count = columnHeight
+                    middle = column
 
-                for i in range(count):
+                for current in middle:
                     connections.append((current, ZoneStep.NORTHWEST))
                     connections.append((current, ZoneStep.SOUTHWEST))
-                    current += ZoneStep.SOUTH
 
             while connections:
-                loc, direction = connections.pop(0)
-                if random.random() >= blockRatio:
+                loc, direction = connections.popleft()
+                if rand() >= blockRatio:
                     zones.connectZone(loc, direction)
 
         location = zones.firstLocation
@@ -66,10 +67,21 @@ class DeploymentLevel(StandardLevel):
         layout = zones.createMapLayout(self.world.layoutDatabase)
         self.world.setLayout(layout)
 
-        leftmost = min(self.world.zones, key=lambda z: z.defn.pos[0])
-        rightmost = max(self.world.zones, key=lambda z: z.defn.pos[0])
-        for zone in self.world.zones:
-            if zone not in (leftmost, rightmost):
+        # Find the leftmost and rightmost zones in a single pass.
+        worldZones = self.world.zones
+        leftmost = rightmost = None
+        for zone in worldZones:
+            x = zone.defn.pos[0]
+            if leftmost is None:
+                leftmost = rightmost = zone
+                minX = maxX = x
+            elif x < minX:
+                leftmost, minX = zone, x
+            elif x > maxX:
+                rightmost, maxX = zone, x
+
+        for zone in worldZones:
+            if zone is not leftmost and zone is not rightmost:
                 if zone.owner:
                     zone.owner.zoneLost()
                 zone.owner = None
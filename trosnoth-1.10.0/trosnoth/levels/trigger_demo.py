@@ -62,11 +62,12 @@ class TriggerDemoLevel(Level):
         self.world.addRegion(helperRegion)
         self.world.addRegion(zoneTwoRegion)
 
+        def isHuman(event, details):
+            return details['player'] == human
+
         while True:
             event, details = yield waitForEvents([
-                helperRegion.onEnter, zoneTwoRegion.onEnter])
-            if details['player'] != human:
-                continue
+                helperRegion.onEnter, zoneTwoRegion.onEnter], isHuman)
             if event == zoneTwoRegion.onEnter:
                 self.playSound('custom-not-there.ogg')
                 self.sendPrivateChat(
@@ -86,10 +87,7 @@ class TriggerDemoLevel(Level):
         if not helperRegion.check(human):
             self.playSound('custom-come-on.ogg')
             self.sendPrivateChat(self.helperBot.player, human, 'Come on!!')
-            while True:
-                details = yield helperRegion.onEnter.wait()
-                if details['player'] == human:
-                    break
+            yield helperRegion.onEnter.wait(isHuman)
 
         self.playSound('custom-capture-orb.ogg')
         self.sendPrivateChat(
@@ -109,7 +107,7 @@ class TriggerDemoLevel(Level):
 
     def findReasonPlayerCannotJoin(self, game, teamId, user, bot):
         # Only allow one human player to join
-        if any(not p.bot for p in self.world.players):
+        if self.world.humanPlayers:
             return GAME_FULL_REASON
         if bot:
             return UNAUTHORISED_REASON
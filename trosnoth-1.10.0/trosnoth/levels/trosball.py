@@ -14,7 +14,7 @@ from trosnoth.triggers.coins import (
 )
 from trosnoth.triggers.rabbits import RabbitHuntTrigger
 from trosnoth.triggers.trosball import StandardTrosballScoreTrigger
-from trosnoth.utils.event import waitForEvents
+from trosnoth.utils.event import EventQueue
 
 log = logging.getLogger(__name__)
 
@@ -26,6 +26,7 @@ class TrosballMatchBase(Level):
         self.totalDuration = duration
         self.roundDuration = duration
         self.scoreTrigger = None
+        self.roundEvents = None
 
     def setupMap(self):
         self.scoreTrigger = StandardTrosballScoreTrigger(self)
@@ -44,21 +45,32 @@ class TrosballMatchBase(Level):
 
         onBuzzer = self.world.clock.onZero
         onScore = self.scoreTrigger.onTrosballScore
-        while True:
-            self.initCountdown()
-            yield onBuzzer.wait()
-            if startingCoinsTrigger:
-                startingCoinsTrigger.deactivate()
-                startingCoinsTrigger = None
-
-            self.initRound()
-            event, args = yield waitForEvents([onBuzzer, onScore])
-            if event == onBuzzer:
-                break
-            self.handleScore(**args)
-
-            yield self.world.sleep(3)
-            self.resetMap()
+        events = self.roundEvents = EventQueue([onBuzzer, onScore])
+        try:
+            while True:
+                self.initCountdown()
+                events.clear()
+                while True:
+                    # Scores do not count during the countdown
+                    event, args = yield events.get()
+                    if event == onBuzzer:
+                        break
+                if startingCoinsTrigger:
+                    startingCoinsTrigger.deactivate()
+                    startingCoinsTrigger = None
+
+                self.initRound()
+                events.clear()
+                event, args = yield events.get()
+                if event == onBuzzer:
+                    break
+                self.handleScore(**args)
+
+                yield self.world.sleep(3)
+                self.resetMap()
+        finally:
+            events.close()
+            self.roundEvents = None
 
         self.doGameOver()
 
@@ -106,30 +118,37 @@ class TrosballMatchBase(Level):
             message = 'Score for %s!' % (team.teamName,)
         self.notifyAll(message)
 
-        teams = list(self.world.teams)
+        teamA, teamB = self.world.teams
+        teamScores = self.world.scoreboard.teamScores
         message = '%s: %d - %s: %d' % (
-            teams[0].teamName,
-            self.world.scoreboard.teamScores[teams[0]],
-            teams[1].teamName,
-            self.world.scoreboard.teamScores[teams[1]],
+            teamA.teamName, teamScores[teamA],
+            teamB.teamName, teamScores[teamB],
         )
         self.notifyAll(message)
 
     def resetMap(self):
-        self.world.deactivateStats()
+        world = self.world
+        world.deactivateStats()
         self.makeNewMap(first=False)
-        for player in self.world.players:
-            zone = self.world.selectZoneForTeam(player.teamId)
-            player.teleportToZoneCentre(zone)
+        world.teleportPlayersToTeamZones()
+        for player in world.players:
             player.health = 0
             player.zombieHits = 0
             player.items.clear()
             player.respawnGauge = 0.0
             player.resyncBegun()
 
-        self.world.trosballManager.resetToCentreOfMap()
-        self.world.syncEverything()
-        self.world.loadPathFindingData()
+        world.trosballManager.resetToCentreOfMap()
+        world.syncEverything()
+        world.loadPathFindingData()
+
+    def tearDownLevel(self):
+        # If the level is torn down mid-match, the round loop is left waiting
+        # on this queue, and the queue's listeners would keep it alive.
+        if self.roundEvents is not None:
+            self.roundEvents.close()
+            self.roundEvents = None
+        super(TrosballMatchBase, self).tearDownLevel()
 
     def initCountdown(self, delay=6):
         self.world.clock.startCountDown(delay, flashBelow=0)
@@ -27,11 +27,24 @@ class TutorialLevel(Level):
     triggers, but sets up its own.
     '''
 
+    # Each stage plays a sound, then waits for the player to reach the given
+    # area of the map.
+    STAGES = (
+        ('tutorial1.ogg', (1080, 974, 200, 200)),
+        ('tutorial2.ogg', (1178, 900, 200, 92)),
+        ('tutorial3.ogg', (2000, 500, 300, 200)),
+        ('tutorial4.ogg', (3350, 350, 100, 100)),
+        ('tutorial6.ogg', (3090, 730, 450, 100)),
+        ('tutorial5.ogg', (3135, 789, 400, 100)),
+        ('tutorial7.ogg', (3552, 743, 100, 400)),
+    )
+
     def __init__(self):
         super(TutorialLevel, self).__init__()
         self.world = None
         self.blueTeam = None
         self.helperBot = None
+        self.stages = []
 
     def setupMap(self):
         self.blueTeam = self.world.teams[0]
@@ -64,6 +77,10 @@ class TutorialLevel(Level):
             zone.owner = self.blueTeam
             zone.dark = False
 
+        self.stages = [
+            (sound, RectRegion(self.world, rect))
+            for sound, rect in self.STAGES]
+
     def applyBlock(self, layout, blockName, y, x, reversed=False):
         blockLayout = self.world.layoutDatabase.getLayoutByFilename(
             blockName + '.block', reversed=reversed)
@@ -122,57 +139,21 @@ class TutorialLevel(Level):
             nastyBot2.player, (7168, 768), alive=True)
 
         yield self.world.sleep(0.5)
-        # self.sendPrivateChat(human, human, 'Sound 1')
-        self.playSound('tutorial1.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(1080, 974, 200, 200)))
-
-        # self.sendPrivateChat(human, human, 'Sound 2')
-        self.playSound('tutorial2.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(1178, 900, 200, 92)))
-
-        # self.sendPrivateChat(human, human, 'Sound 3')
-        self.playSound('tutorial3.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(2000, 500, 300, 200)))
-
-        # self.sendPrivateChat(human, human, 'Sound 4')
-        self.playSound('tutorial4.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(3350, 350, 100, 100))
-        )
-
-        # self.sendPrivateChat(human, human, 'Sound 6')
-        self.playSound('tutorial6.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(3090, 730, 450, 100))
-        )
-
-        # self.sendPrivateChat(human, human, 'Sound5')
-        self.playSound('tutorial5.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(3135, 789, 400, 100))
-        )
-
-        # self.sendPrivateChat(human, human, 'Sound7')
-        self.playSound('tutorial7.ogg')
-
-        yield self.regionWait(
-            RectRegion(self.world, pygame.Rect(3552, 743, 100, 400))
-        )
+        for sound, region in self.stages:
+            self.playSound(sound)
+            yield self.regionWait(region)
 
         # self.sendPrivateChat(human, human, 'Sound8')
         self.playSound('tutorial8.ogg')
 
-        while pygame.mixer.Channel(0).get_busy():
-            yield self.world.sleep(0.1)
+        # Wait for the sound to finish in one go rather than polling the mixer
+        channel = pygame.mixer.Channel(0)
+        if channel.get_busy():
+            sound = channel.get_sound()
+            if sound is not None:
+                d = defer.Deferred()
+                reactor.callLater(sound.get_length(), d.callback, None)
+                yield d
 
         # self.sendPrivateChat(human, human, 'Sound9')
         self.playSound('tutorial9.ogg')
@@ -270,28 +251,35 @@ class TutorialLevel(Level):
         # yield self.world.sleep(2)
         # Do game over
 
-    @defer.inlineCallbacks
     def regionWait(self, region):
         self.world.addRegion(region)
-        while not region.check(self.human):
-            details = yield region.onEnter.wait()
-        self.world.removeRegion(region)
+        if region.check(self.human):
+            self.world.removeRegion(region)
+            return defer.succeed(None)
+
+        d = waitForEvents(
+            [region.onEnter], lambda event, details: region.check(self.human))
+        d.addCallback(lambda result: self.world.removeRegion(region))
+        return d
 
-    @defer.inlineCallbacks
     def startMarching(self, bot, start, end):
-        while not bot.player.dead:
-            bot.moveToPoint(end)
-            yield bot.onOrderFinished.wait()
-            yield self.world.sleep(random.random())
+        '''
+        Keeps the given bot walking back and forth between start and end,
+        pausing briefly at each end, until it dies.
+        '''
+        def march(target, other):
             if bot.player.dead:
-                break
-            bot.moveToPoint(start)
-            yield bot.onOrderFinished.wait()
-            yield self.world.sleep(random.random())
+                return
+            bot.moveToPoint(target)
+            d = bot.onOrderFinished.wait()
+            d.addCallback(lambda result: self.world.sleep(random.random()))
+            d.addCallback(lambda result: march(other, target))
+
+        march(end, start)
 
     def findReasonPlayerCannotJoin(self, game, teamId, user, bot):
         # Only allow one human player to join
-        if any(not p.bot for p in self.world.players):
+        if self.world.humanPlayers:
             return GAME_FULL_REASON
         if bot:
             return UNAUTHORISED_REASON
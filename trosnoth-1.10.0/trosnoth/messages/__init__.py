@@ -21,8 +21,9 @@ from trosnoth.messages.gameplay import (    # noqa
     RemoveCollectableCoinMsg, PlayerUpdateMsg, RespawnMsg, CheckSyncMsg,
     RespawnRequestMsg, CannotRespawnMsg, DelayUpdatedMsg,
     ResyncPlayerMsg, ResyncAcknowledgedMsg, ShotHitPlayerMsg,
-    UpdatePlayerStateMsg, AimPlayerAtMsg, ShootMsg, ShotFiredMsg,
-    FireShoxwaveMsg, PlayerNoticedZombieHitMsg, ChatFromServerMsg, ChatMsg,
+    UpdatePlayerStateMsg, UpdatePlayerStatesMsg, AimPlayerAtMsg, ShootMsg,
+    ShotFiredMsg, FireShoxwaveMsg, PlayerNoticedZombieHitMsg,
+    ChatFromServerMsg, ChatMsg,
 )
 from trosnoth.messages.setup import (       # noqa
     ChangeNicknameMsg, PlayerIsReadyMsg, SetPreferredTeamMsg,
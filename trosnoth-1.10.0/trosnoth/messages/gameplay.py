@@ -252,6 +252,60 @@ class UpdatePlayerStateMsg(ClientCommand):
             player.updateState(self.stateKey, self.value)
 
 
+class UpdatePlayerStatesMsg(ClientCommand):
+    '''
+    Changes several player state keys at once. The mask says which keys
+    are included and values gives their new values, using one bit per key
+    in the order of STATE_KEYS.
+    '''
+    idString = 'Prss'
+    fields = 'mask', 'values', 'tickId', 'playerId'
+    packspec = 'BBHc'
+    timestampedPlayerRequest = True
+    playerId = NO_PLAYER
+
+    STATE_KEYS = ('left', 'right', 'jump', 'down')
+
+    @classmethod
+    def build(cls, states, tickId):
+        '''
+        Builds a message from a mapping of state key to value.
+        '''
+        mask = values = 0
+        for i, key in enumerate(cls.STATE_KEYS):
+            if key in states:
+                mask |= 1 << i
+                if states[key]:
+                    values |= 1 << i
+        return cls(mask, values, tickId)
+
+    def getStates(self):
+        for i, key in enumerate(self.STATE_KEYS):
+            if self.mask & (1 << i):
+                yield key, bool(self.values & (1 << i))
+
+    def clientValidate(self, localState, world, sendResponse):
+        if not localState.player:
+            return False
+        return True
+
+    def applyRequestToLocalState(self, localState):
+        for key, value in self.getStates():
+            localState.player.updateState(key, value)
+
+    def serverApply(self, game, agent):
+        if not agent.player or agent.player.resyncing:
+            return
+        self.playerId = agent.player.id
+        game.sendServerCommand(self)
+
+    def applyOrderToWorld(self, world):
+        player = world.getPlayer(self.playerId)
+        if player:
+            for key, value in self.getStates():
+                player.updateState(key, value)
+
+
 class AimPlayerAtMsg(ClientCommand):
     idString = 'Aim@'
     fields = 'angle', 'thrust', 'tickId', 'playerId'
@@ -1,11 +1,14 @@
+from collections import deque
+from itertools import chain
 import logging
+from operator import itemgetter
 import traceback
 
 from twisted.internet import reactor
 
 from trosnoth.const import TICK_PERIOD, INITIAL_ASSUMED_LATENCY, BOT_GOAL_NONE
 from trosnoth.messages import (
-    JoinRequestMsg, TickMsg, ResyncPlayerMsg, UpdatePlayerStateMsg,
+    JoinRequestMsg, TickMsg, ResyncPlayerMsg, UpdatePlayerStatesMsg,
     AimPlayerAtMsg, UpgradeApprovedMsg, PlayerHasUpgradeMsg, ShootMsg,
     CheckSyncMsg, WorldResetMsg, BuyUpgradeMsg,
 )
@@ -18,6 +21,10 @@ log = logging.getLogger(__name__)
 
 SYNC_CHECK_PERIOD = 3 / TICK_PERIOD
 
+# Used to take a cheap snapshot of a player's key state as a tuple
+STATE_KEYS = UpdatePlayerStatesMsg.STATE_KEYS
+getKeyValues = itemgetter(*STATE_KEYS)
+
 
 class Agent(object):
     '''
@@ -26,6 +33,10 @@ class Agent(object):
     the network, or anything else that wants to receive interact with the game.
     '''
 
+    # Subclasses which do not declare __slots__ still get a __dict__ as
+    # usual. __weakref__ is needed because agents are event listeners.
+    __slots__ = ('game', 'player', 'stopped', '__weakref__')
+
     def __init__(self, game, *args, **kwargs):
         super(Agent, self).__init__(*args, **kwargs)
         self.game = game
@@ -78,6 +89,8 @@ class ConcreteAgent(Agent, MessageConsumer):
         self.localState = LocalState(self)
         self.lastPlayerAimSent = (None, None)
         self.nextSyncCheck = None
+        self.pendingRequests = deque()
+        self._agentRequest = self.game.agentRequest
 
     def gotServerCommand(self, msg):
         msg.tracePoint(self, 'gotServerCommand')
@@ -108,7 +121,40 @@ class ConcreteAgent(Agent, MessageConsumer):
             # Special case: before shooting make sure the server knows what
             # direction we are facing.
             self.maybeSendAimMsg(self.world.lastTickId)
-        reactor.callLater(0, self.game.agentRequest, self, msg)
+        self._queueRequest(msg)
+
+    def _queueRequest(self, msg):
+        '''
+        Requests are passed to the game from the reactor rather than straight
+        away, so that the game's response cannot arrive back at this agent
+        in the middle of whatever it is doing. Requests queued up before the
+        reactor gets around to it are all passed on together.
+        '''
+        if not self.pendingRequests:
+            reactor.callLater(0, self._sendPendingRequests)
+        self.pendingRequests.append(msg)
+
+    def _sendPendingRequests(self):
+        pending = self.pendingRequests
+        agentRequest = self._agentRequest
+        while pending:
+            msg = pending.popleft()
+            # A failed request must not hold up the ones queued behind it.
+            try:
+                agentRequest(self, msg)
+            except Exception:
+                log.exception('Error passing %r to game', msg)
+
+    def sendSyncCheck(self, msg):
+        '''
+        Sends a CheckSyncMsg. These are sent regularly and need none of the
+        local validation or special cases in sendRequest(), so they go
+        straight to the request queue.
+        '''
+        if self.stopped:
+            return
+        msg.tracePoint(self, 'sendRequest')
+        self._queueRequest(msg)
 
     def _validationResponse(self, msg):
         self.consumeMsg(msg)
@@ -121,7 +167,7 @@ class ConcreteAgent(Agent, MessageConsumer):
         super(ConcreteAgent, self).setPlayer(player)
         if player:
             self.localState.playerJoined(player)
-            self.resyncLocalPlayer({})
+            self.resyncLocalPlayer(None)
         else:
             self.localState.lostPlayer()
 
@@ -130,9 +176,9 @@ class ConcreteAgent(Agent, MessageConsumer):
     @WorldResetMsg.handler
     def handle_WorldResetMsg(self, msg):
         if self.player is not None:
-            oldKeyState = dict(self.localState.player._state)
+            oldKeyValues = getKeyValues(self.localState.player._state)
             self.localState.refreshPlayer()
-            self.resyncLocalPlayer(oldKeyState)
+            self.resyncLocalPlayer(oldKeyValues)
 
     @TickMsg.handler
     def handle_TickMsg(self, msg):
@@ -140,12 +186,13 @@ class ConcreteAgent(Agent, MessageConsumer):
         self.localState.tick()
 
         player = self.localState.player
-        now = self.world.getMonotonicTick()
+        world = self.world
+        now = world.getMonotonicTick()
         if player and self.nextSyncCheck <= now:
             self.nextSyncCheck = now + SYNC_CHECK_PERIOD
-            self.sendRequest(CheckSyncMsg(
-                self.world.lastTickId, player.pos[0],
-                player.pos[1], player.yVel))
+            x, y = player.pos
+            self.sendSyncCheck(CheckSyncMsg(
+                world.lastTickId, x, y, player.yVel))
 
     def maybeSendAimMsg(self, tickId):
         '''
@@ -153,31 +200,39 @@ class ConcreteAgent(Agent, MessageConsumer):
         '''
         player = self.localState.player
         if player:
+            angle = player.angleFacing
+            thrust = player.ghostThrust
             lastAngle, lastThrust = self.lastPlayerAimSent
-            if (
-                    lastAngle != player.angleFacing or
-                    lastThrust != player.ghostThrust):
-                reactor.callLater(
-                    0, self.game.agentRequest, self, AimPlayerAtMsg(
-                        player.angleFacing, player.ghostThrust, tickId))
-                self.lastPlayerAimSent = (
-                    player.angleFacing, player.ghostThrust)
+            if lastAngle != angle or lastThrust != thrust:
+                self._queueRequest(AimPlayerAtMsg(angle, thrust, tickId))
+                self.lastPlayerAimSent = (angle, thrust)
 
     @ResyncPlayerMsg.handler
     def handle_ResyncPlayerMsg(self, msg):
-        oldKeyState = dict(self.localState.player._state)
+        oldKeyValues = getKeyValues(self.localState.player._state)
         self.localState.player.applyPlayerUpdate(msg)
-        self.resyncLocalPlayer(oldKeyState)
+        self.resyncLocalPlayer(oldKeyValues)
 
-    def resyncLocalPlayer(self, oldKeyState):
-        newKeyState = self.localState.player._state
-        self.sendRequest(self.localState.player.buildResyncAcknowledgement())
-        self.nextSyncCheck = self.world.getMonotonicTick() + SYNC_CHECK_PERIOD
+    def resyncLocalPlayer(self, oldKeyValues):
+        '''
+        oldKeyValues is the player's key state from before the resync, as
+        returned by getKeyValues(), or None if there is nothing to restore.
+        '''
+        player = self.localState.player
+        world = self.world
+        self.sendRequest(player.buildResyncAcknowledgement())
+        self.nextSyncCheck = world.getMonotonicTick() + SYNC_CHECK_PERIOD
 
-        for key, value in oldKeyState.items():
-            if value != newKeyState[key]:
-                self.sendRequest(UpdatePlayerStateMsg(
-                    value, self.world.lastTickId, stateKey=key))
+        if oldKeyValues is None:
+            return
+        newKeyValues = getKeyValues(player._state)
+        changes = dict(
+            (key, old) for key, old, new in zip(
+                STATE_KEYS, oldKeyValues, newKeyValues)
+            if old != new)
+        if changes:
+            self.sendRequest(UpdatePlayerStatesMsg.build(
+                changes, world.lastTickId))
 
     @UpgradeApprovedMsg.handler
     def handle_UpgradeApprovedMsg(self, msg):
@@ -208,6 +263,7 @@ class LocalState(object):
     '''
 
     LOCAL_ID_CAP = 1 << 16
+    LOCAL_ID_MASK = LOCAL_ID_CAP - 1
 
     def __init__(self, agent):
         self.onGameInfoChanged = Event([])
@@ -225,7 +281,7 @@ class LocalState(object):
         self.userTitle = ''
         self.userInfo = ()
         self.botGoal = BOT_GOAL_NONE
-        self.unverifiedItems = []
+        self.unverifiedItems = deque()
         self.world.onShotRemoved.addListener(self.shotRemoved)
 
     @property
@@ -277,7 +333,7 @@ class LocalState(object):
             localId = 0
         else:
             localId = self.nextLocalId
-            self.nextLocalId = (self.nextLocalId + 1) % self.LOCAL_ID_CAP
+            self.nextLocalId = (self.nextLocalId + 1) & self.LOCAL_ID_MASK
             self.localShots[localId] = shot = self.player.createShot(
                 shotClass=LocalShot)
             self.onAddLocalShot(shot)
@@ -310,32 +366,37 @@ class LocalState(object):
         self.localGrenade = None
 
     def tick(self):
-        if self.player:
-            self.player.reset()
-            self.player.advance()
+        player = self.player
+        shotById = self.shotById
+        localShots = self.localShots
+
+        if player:
+            player.reset()
+            player.advance()
 
-            if not self.player.dead:
+            if not player.dead:
                 for unit in self.world.getCollectableUnits():
                     if unit.hitLocalPlayer:
                         continue
-                    if unit.checkCollision(self.player, 0):
-                        unit.collidedWithLocalPlayer(self.player)
+                    if unit.checkCollision(player, 0):
+                        unit.collidedWithLocalPlayer(player)
 
-        for shot in self.shotById.values() + self.localShots.values():
+        for shot in chain(shotById.itervalues(), localShots.itervalues()):
             shot.reset()
             shot.advance()
-        if self.localGrenade:
-            self.localGrenade.reset()
-            self.localGrenade.advance()
-
-        for shotId, shot in self.shotById.items():
-            if shot.expired:
-                del self.shotById[shotId]
-                self.onRemoveLocalShot(shot)
-        for localId, shot in self.localShots.items():
-            if shot.expired:
-                del self.localShots[localId]
-                self.onRemoveLocalShot(shot)
+        localGrenade = self.localGrenade
+        if localGrenade:
+            localGrenade.reset()
+            localGrenade.advance()
+
+        onRemoveLocalShot = self.onRemoveLocalShot
+        for shots in (shotById, localShots):
+            expired = [
+                (shotId, shot) for shotId, shot in shots.iteritems()
+                if shot.expired]
+            for shotId, shot in expired:
+                del shots[shotId]
+                onRemoveLocalShot(shot)
 
     def addUnverifiedItem(self, item):
         self.unverifiedItems.append(item)
@@ -345,5 +406,5 @@ class LocalState(object):
 
     def popUnverifiedItem(self):
         if self.unverifiedItems:
-            return self.unverifiedItems.pop(0)
+            return self.unverifiedItems.popleft()
         return None
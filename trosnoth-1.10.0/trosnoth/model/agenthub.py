@@ -1,3 +1,4 @@
+from collections import deque
 import logging
 
 from twisted.internet import defer
@@ -9,6 +10,10 @@ from trosnoth.model.universe_base import NO_PLAYER
 
 log = logging.getLogger(__name__)
 
+# SetAgentPlayerMsg is never modified once built and there are only a few
+# possible player ids, so one message is kept for each.
+_setAgentPlayerMsgs = {}
+
 
 class LocalHub(Hub):
     '''
@@ -24,26 +29,40 @@ class LocalHub(Hub):
         super(LocalHub, self).__init__(*args, **kwargs)
         self.game = game
         self.agents = {}
+
+        # Ids are handed out in order until they run out, then released ids
+        # are reused oldest first, so an id is not reused straight away.
         self.nextId = 0
+        self.freeIds = deque()
 
     def disconnectNode(self):
         super(LocalHub, self).disconnectNode()
-        for agentId in self.agents.keys():
-            self.disconnectAgent(agentId)
+        # Disconnecting one agent may cause others to disconnect too.
+        for agent in list(self.agents.itervalues()):
+            if self.agents.get(agent.agentId) is agent:
+                self.disconnectAgent(agent.agentId)
 
     @defer.inlineCallbacks
     def connectNewAgent(self):
-        result = self.nextId
         if len(self.agents) >= MAX_AGENT_ID:
             raise UnableToConnect('No spare agent IDs')
-        while result in self.agents:
-            result = (result + 1) % (MAX_AGENT_ID + 1)
+        if self.nextId <= MAX_AGENT_ID:
+            result = self.nextId
+            self.nextId += 1
+        elif self.freeIds:
+            result = self.freeIds.popleft()
+        else:
+            # Every remaining id belongs to an agent that is still connecting
+            raise UnableToConnect('No spare agent IDs')
 
         agent = LocalHubAgent(self, result)
-        yield self.game.addAgent(agent)
+        try:
+            yield self.game.addAgent(agent)
+        except:
+            self.freeIds.append(result)
+            raise
 
         self.agents[result] = agent
-        self.nextId = (result + 1) % (MAX_AGENT_ID + 1)
         defer.returnValue(result)
 
     def disconnectAgent(self, agentId):
@@ -52,7 +71,8 @@ class LocalHub(Hub):
         self.agentDisconnected(agent)
 
     def sendRequestToGame(self, agentId, msg):
-        msg.tracePoint(self, 'sendRequestToGame')
+        if msg.trace:
+            msg.tracePoint(self, 'sendRequestToGame')
         self.game.agentRequest(self.agents[agentId], msg)
 
     def agentDisconnected(self, agent):
@@ -60,7 +80,7 @@ class LocalHub(Hub):
         Called when the game indicates that the connection to this agent is
         lost.
         '''
-        if agent.agentId not in self.agents:
+        if self.agents.get(agent.agentId) is not agent:
             # It may be possible for this to be triggered twice for the same
             # agent, but we only want it to run once.
             return
@@ -69,9 +89,11 @@ class LocalHub(Hub):
             self.node.agentDisconnected(agent.agentId)
         agent.stop()
         del self.agents[agent.agentId]
+        self.freeIds.append(agent.agentId)
 
 
 class LocalHubAgent(Agent):
+    __slots__ = ('hub', 'agentId')
 
     def __init__(self, hub, agentId, *args, **kwargs):
         super(LocalHubAgent, self).__init__(game=hub.game, *args, **kwargs)
@@ -79,17 +101,22 @@ class LocalHubAgent(Agent):
         self.agentId = agentId
 
     def messageToAgent(self, msg):
-        msg.tracePoint(self, 'messageToAgent')
-        if self.hub.node:
-            self.hub.node.gotMessageToAgent(self.agentId, msg)
+        if msg.trace:
+            msg.tracePoint(self, 'messageToAgent')
+        node = self.hub.node
+        if node:
+            node.gotMessageToAgent(self.agentId, msg)
 
     def gotServerCommand(self, msg):
-        msg.tracePoint(self, 'gotServerCommand')
-        if self.hub.node:
+        if msg.trace:
+            msg.tracePoint(self, 'gotServerCommand')
+        hub = self.hub
+        node = hub.node
+        if node:
             if isinstance(msg, ConnectionLostMsg):
-                self.hub.agentDisconnected(self)
+                hub.agentDisconnected(self)
             else:
-                self.hub.node.gotServerCommand(msg)
+                node.gotServerCommand(msg)
 
     def setPlayer(self, player):
         super(LocalHubAgent, self).setPlayer(player)
@@ -97,4 +124,8 @@ class LocalHubAgent(Agent):
         # To get this across the hub/node interface it must be encoded as a
         # message.
         playerId = player.id if player else NO_PLAYER
-        self.messageToAgent(SetAgentPlayerMsg(playerId))
+        try:
+            msg = _setAgentPlayerMsgs[playerId]
+        except KeyError:
+            msg = _setAgentPlayerMsgs[playerId] = SetAgentPlayerMsg(playerId)
+        self.messageToAgent(msg)
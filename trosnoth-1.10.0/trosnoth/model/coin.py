@@ -4,7 +4,7 @@ from trosnoth.const import DEFAULT_COIN_VALUE
 from trosnoth.messages import AwardPlayerCoinMsg, RemoveCollectableCoinMsg
 from trosnoth.model.unit import Bouncy, CollectableUnit
 from trosnoth.utils.event import Event
-from trosnoth.utils.math import distance
+from trosnoth.utils.math import distanceSquared
 
 log = logging.getLogger('coin')
 
@@ -17,6 +17,7 @@ class BouncyPlayerAttractor(Bouncy):
     gravity = 1000
     playerAttraction = 500
     attractiveRadius = 85
+    ATTRACTIVE_RADIUS_SQUARED = attractiveRadius ** 2
 
     def advance(self):
         try:
@@ -34,7 +35,8 @@ class BouncyPlayerAttractor(Bouncy):
 
             oldX, oldY = self.pos
             obstacle = self.world.physics.moveUnit(self, deltaX, deltaY)
-            if distance(self.pos, (oldX, oldY)) < self.stopToleranceDistance:
+            if (distanceSquared(self.pos, (oldX, oldY)) <
+                    self.STOP_TOLERANCE_DISTANCE_SQUARED):
                 self.stationaryTicks += 1
                 if self.stationaryTicks > self.stopToleranceTicks:
                     self.xVel = self.yVel = 0
@@ -54,9 +56,11 @@ class BouncyPlayerAttractor(Bouncy):
         closest = None
         livePlayers = [p for p in self.world.players if not p.dead]
         if livePlayers:
-            minDist, discard, player = min(
-                (distance(p.pos, self.pos), p.id, p) for p in livePlayers)
-            if 0 < minDist < self.attractiveRadius:
+            minDistSquared, discard, player = min(
+                (distanceSquared(p.pos, self.pos), p.id, p)
+                for p in livePlayers)
+            if 0 < minDistSquared < self.ATTRACTIVE_RADIUS_SQUARED:
+                minDist = minDistSquared ** 0.5
                 xr = (player.pos[0] - self.pos[0]) / minDist
                 yr = (player.pos[1] - self.pos[1]) / minDist
                 x = self.playerAttraction * xr
@@ -78,7 +78,7 @@ class Player(Unit):
         self.nick = nick
         self.user = None      # If authenticated, this will have a value.
         self.agent = None
-        self.team = team
+        self._team = team
         self.id = id
         self.bot = bot
 
@@ -105,6 +105,8 @@ class Player(Unit):
         self._unstickyWall = None
         self._ignore = None         # Used when dropping through a platform.
         self.angleFacing = 1.57
+        self._sinCosAngle = None
+        self._sinCos = None
         self.ghostThrust = 0.0      # Determined by mouse position
         self._faceRight = True
         self.reloadTime = 0.0
@@ -202,6 +204,16 @@ class Player(Unit):
         self.readyToStart = preferences['ready']
         self.onTeamSet()
 
+    @property
+    def team(self):
+        return self._team
+
+    @team.setter
+    def team(self, team):
+        oldTeam, self._team = self._team, team
+        if oldTeam != team:
+            self.world.playerTeamChanged(self, oldTeam)
+
     def isCanonicalPlayer(self):
         return self in self.world.players
 
@@ -587,18 +599,30 @@ class Player(Unit):
     def isFacingRight(self):
         return self._faceRight
 
+    def getAngleSinCos(self):
+        '''
+        Returns (sin(angleFacing), cos(angleFacing)), only recalculating them
+        when the angle has changed.
+        '''
+        angle = self.angleFacing
+        if angle != self._sinCosAngle:
+            self._sinCosAngle = angle
+            self._sinCos = (sin(angle), cos(angle))
+        return self._sinCos
+
     def activateItemByCode(self, upgradeType, local=None):
         upgradeClass = self.world.getUpgradeType(upgradeType)
         return self.items.activate(upgradeClass, local)
 
     def updateGhost(self):
         deltaT = self.world.tickPeriod
+        sinAngle, cosAngle = self.getAngleSinCos()
         deltaX = (
             self.world.physics.playerMaxGhostVel * deltaT
-            * sin(self.angleFacing) * self.ghostThrust)
+            * sinAngle * self.ghostThrust)
         deltaY = (
             -self.world.physics.playerMaxGhostVel * deltaT
-            * cos(self.angleFacing) * self.ghostThrust)
+            * cosAngle * self.ghostThrust)
 
         self.world.physics.moveUnit(self, deltaX, deltaY)
 
@@ -1254,12 +1278,13 @@ class Player(Unit):
         f = self.world.physics.fractionOfPlayerVelocityImpartedToShots
         xVel = (self.pos[0] - self.oldPos[0]) / self.world.tickPeriod
         yVel = (self.pos[1] - self.oldPos[1]) / self.world.tickPeriod
+        sinAngle, cosAngle = self.getAngleSinCos()
         shotVel = self.world.physics.shotSpeed + f * (
-            xVel * sin(self.angleFacing) - yVel * cos(self.angleFacing))
+            xVel * sinAngle - yVel * cosAngle)
 
         velocity = (
-            shotVel * sin(self.angleFacing),
-            -shotVel * cos(self.angleFacing),
+            shotVel * sinAngle,
+            -shotVel * cosAngle,
         )
 
         kind = self.getShotType()
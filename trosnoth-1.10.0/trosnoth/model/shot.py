@@ -9,6 +9,7 @@ from trosnoth.utils.collision import collideTrajectory
 log = logging.getLogger('shot')
 
 GRENADE_BLAST_RADIUS = 448
+GRENADE_BLAST_RADIUS_SQUARED = GRENADE_BLAST_RADIUS ** 2
 
 
 class LocalSprite(object):
@@ -64,9 +65,9 @@ class GrenadeShot(Bouncy):
 
         # Place myself.
         self.pos = self.oldPos = player.pos
-        angle = player.angleFacing
-        self.xVel = self.world.physics.grenadeInitVel * sin(angle)
-        self.yVel = -self.world.physics.grenadeInitVel * cos(angle)
+        sinAngle, cosAngle = player.getAngleSinCos()
+        self.xVel = self.world.physics.grenadeInitVel * sinAngle
+        self.yVel = -self.world.physics.grenadeInitVel * cosAngle
 
     def getGravity(self):
         return self.world.physics.grenadeGravity
@@ -87,9 +88,9 @@ class GrenadeShot(Bouncy):
                         or player.isInvulnerable() or player.turret
                         or player.dead):
                     continue
-                dist = ((player.pos[0] - xpos) ** 2 +
-                        (player.pos[1] - ypos) ** 2) ** 0.5
-                if dist <= GRENADE_BLAST_RADIUS:
+                distSquared = ((player.pos[0] - xpos) ** 2 +
+                        (player.pos[1] - ypos) ** 2)
+                if distSquared <= GRENADE_BLAST_RADIUS_SQUARED:
                     # Account for possibility player has left game
                     killer = (
                         self.player if self.player in self.world.players
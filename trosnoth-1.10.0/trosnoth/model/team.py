@@ -17,6 +17,16 @@
 
 class Team(object):
     '''Represents a team of the game'''
+    __slots__ = (
+        'world', 'numZonesOwned', 'orbScore', 'usingMinimapDisruption', 'id',
+        'teamName', 'opposingTeam',
+    )
+
+    defaultNames = {
+        'A': 'Blue players',
+        'B': 'Red players',
+    }
+
     def __init__(self, world, teamID):
         self.world = world
         self.numZonesOwned = 0
@@ -25,14 +35,12 @@ class Team(object):
         self.usingMinimapDisruption = False
 
         if (not isinstance(teamID, str)) or len(teamID) != 1:
-            raise TypeError, 'teamID must be a single character'
+            raise TypeError('teamID must be a single character')
         self.id = teamID
 
-        if teamID == 'A':
-            self.teamName = 'Blue players'
-        elif teamID == 'B':
-            self.teamName = 'Red players'
-        else:
+        try:
+            self.teamName = self.defaultNames[teamID]
+        except KeyError:
             self.teamName = '%s Team' % (teamID,)
 
     def __str__(self):
@@ -113,17 +113,38 @@ class CollectableUnit(Unit):
             pos = self.history[-delay]
             oldPos = self.history[-delay - 1]
 
+        tolerance = self.playerCollisionTolerance
+        playerPos = player.pos
+        playerOldPos = player.oldPos
+
+        # Both checks below can only succeed if the bounding boxes of the two
+        # paths come within tolerance of each other, and most units are
+        # nowhere near the player, so reject those cheaply first. A player
+        # that has not advanced yet has no oldPos, and only the first check
+        # can apply to it.
+        x, y = pos
+        oldX, oldY = oldPos
+        px, py = playerPos
+        if playerOldPos is None:
+            oldPx, oldPy = px, py
+        else:
+            oldPx, oldPy = playerOldPos
+        if (min(x, oldX) - tolerance > max(px, oldPx) or
+                min(px, oldPx) - tolerance > max(x, oldX)):
+            return False
+        if (min(y, oldY) - tolerance > max(py, oldPy) or
+                min(py, oldPy) - tolerance > max(y, oldY)):
+            return False
+
         # Check both player colliding with us and us colliding with player
         if collideTrajectory(
-                player.pos, oldPos, (pos[0] - oldPos[0], pos[1] - oldPos[1]),
-                self.playerCollisionTolerance):
+                playerPos, oldPos, (pos[0] - oldPos[0], pos[1] - oldPos[1]),
+                tolerance):
             return True
 
-        deltaX = player.pos[0] - player.oldPos[0]
-        deltaY = player.pos[1] - player.oldPos[1]
-        if collideTrajectory(
-                pos, player.oldPos, (deltaX, deltaY),
-                self.playerCollisionTolerance):
+        deltaX = playerPos[0] - playerOldPos[0]
+        deltaY = playerPos[1] - playerOldPos[1]
+        if collideTrajectory(pos, playerOldPos, (deltaX, deltaY), tolerance):
             return True
         return False
 
@@ -146,6 +167,7 @@ class CollectableUnit(Unit):
 
 class Bouncy(Unit):
     stopToleranceDistance = 1
+    STOP_TOLERANCE_DISTANCE_SQUARED = stopToleranceDistance ** 2
     stopToleranceTicks = 5
     dampingFactor = 0.9
 
@@ -170,7 +192,7 @@ class Bouncy(Unit):
             oldX, oldY = self.pos
             obstacle = self.world.physics.moveUnit(self, deltaX, deltaY)
             if ((self.pos[0] - oldX) ** 2 + (self.pos[1] - oldY) ** 2 <
-                    self.stopToleranceDistance ** 2):
+                    self.STOP_TOLERANCE_DISTANCE_SQUARED):
                 self.stationaryTicks += 1
                 if self.stationaryTicks > self.stopToleranceTicks:
                     self.stopped = True
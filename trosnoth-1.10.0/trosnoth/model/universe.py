@@ -5,9 +5,9 @@ from __future__ import division
 
 from collections import defaultdict
 import heapq
+from itertools import chain
 import json
 import logging
-from math import sin, cos
 import random
 
 import pygame
@@ -36,7 +36,7 @@ from trosnoth.model.universe_base import NEUTRAL_TEAM_ID, NO_PLAYER
 from trosnoth.model.voteArbiter import VoteArbiter
 
 from trosnoth.utils.event import Event
-from trosnoth.utils.math import distance
+from trosnoth.utils.math import distanceSquared
 from trosnoth.utils.message import MessageConsumer
 from trosnoth.utils.twist import WeakCallLater
 from trosnoth.utils.unrepr import unrepr
@@ -56,9 +56,21 @@ from trosnoth.messages import (
 log = logging.getLogger('universe')
 
 DEFAULT_GAME_COUNTDOWN = 10
+REGION_GRID_CELL_SIZE = 256
+
+# Settings messages go to every client, so leave out the default padding.
+COMPACT_JSON_SEPARATORS = (',', ':')
+NEIGHBOURING_BUCKET_OFFSETS = tuple(
+    (dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1))
+
+# TICK_LIMIT is a power of two, so tick ids can be wrapped with a mask.
+TICK_ID_MASK = TICK_LIMIT - 1
+assert TICK_LIMIT & TICK_ID_MASK == 0
 
 
 class DelayedCall(object):
+    __slots__ = ('fn', 'args', 'kwargs', 'cancelled')
+
     def __init__(self, fn, args, kwargs):
         self.fn = fn
         self.args = args
@@ -99,19 +111,25 @@ class ScoreBoard(object):
         return {
             'teamScoresEnabled': self.teamScoresEnabled,
             'playerScoresEnabled': self.playerScoresEnabled,
-            'teamScores': {t.id: s for t, s in self.teamScores.items()},
-            'playerScores': {p.id: s for p, s in self.playerScores.items()},
+            'teamScores': {
+                t.id: s for t, s in self.teamScores.iteritems()},
+            'playerScores': {
+                p.id: s for p, s in self.playerScores.iteritems()},
         }
 
     def restoreState(self, data):
         self.teamScoresEnabled = data['teamScoresEnabled']
         self.playerScoresEnabled = data['playerScoresEnabled']
-        for team in self.teamScores:
-            if team.id in data['teamScores']:
-                self.teamScores[team] = data['teamScores'][team.id]
-        for player in self.playerScores:
-            if player.id in data['playerScores']:
-                self.playerScores[player] = data['playerScores'][player.id]
+        self._restoreScores(self.teamScores, data['teamScores'])
+        self._restoreScores(self.playerScores, data['playerScores'])
+
+    @staticmethod
+    def _restoreScores(scores, scoreById):
+        for item in scores:
+            try:
+                scores[item] = scoreById[item.id]
+            except KeyError:
+                pass
 
     def _playerWasAdded(self, player, *args, **kwargs):
         self.playerScores[player] = 0
@@ -167,6 +185,7 @@ class Clock(object):
         self.counting = False
         self.showing = False
         self.upwards = False
+        self._timeStringCache = (None, '--:--')
 
     def dumpState(self):
         return {
@@ -197,13 +216,17 @@ class Clock(object):
             # rather than rounding them down. This is so that the instant it
             # hits zero, the game starts.
             seconds = self.value + 0.999
-        minutes, seconds = divmod(int(seconds), 60)
-        return '%02d:%02d' % (minutes, seconds)
+        seconds = int(seconds)
+
+        # This is called every frame, but only changes once a second.
+        cachedSeconds, result = self._timeStringCache
+        if seconds != cachedSeconds:
+            result = '%02d:%02d' % divmod(seconds, 60)
+            self._timeStringCache = (seconds, result)
+        return result
 
     def shouldFlash(self):
-        if not self.showing:
-            return False
-        if self.flashBelow == 0 or not self.showing:
+        if not self.showing or self.flashBelow == 0:
             return False
         return self.value <= self.flashBelow
 
@@ -270,6 +293,10 @@ class Abilities(object):
         self.zoneCaps = True
         self.renaming = False
 
+        self._validKeys = frozenset(
+            key for key in vars(self)
+            if key not in self.RESERVED_ATTRIBUTES and not key.startswith('_'))
+
     def dumpState(self):
         return {
             'upgrades': self.upgrades,
@@ -291,7 +318,8 @@ class Abilities(object):
         for key in kwargs:
             if not self._isKeyValid(key):
                 raise KeyError('{!r} is not a valid UI option', key)
-        self.world.sendServerCommand(SetWorldAbilitiesMsg(json.dumps(kwargs)))
+        self.world.sendServerCommand(SetWorldAbilitiesMsg(
+            json.dumps(kwargs, separators=COMPACT_JSON_SEPARATORS)))
 
     def reset(self):
         self.set(
@@ -299,13 +327,7 @@ class Abilities(object):
             zoneCaps=True, renaming=False)
 
     def _isKeyValid(self, key):
-        if not hasattr(self, key):
-            return False
-        if key in self.RESERVED_ATTRIBUTES:
-            return False
-        if key.startswith('_'):
-            return False
-        return True
+        return key in self._validKeys
 
     def gotSetWorldAbilitiesMsg(self, settings):
         for key, value in settings.items():
@@ -337,6 +359,10 @@ class UIOptions(object):
         self.showGameOver = False
         self.winningTeamId = NEUTRAL_TEAM_ID
 
+        self._validKeys = frozenset(
+            key for key in vars(self)
+            if key not in self.RESERVED_ATTRIBUTES and not key.startswith('_'))
+
     @property
     def winningTeam(self):
         return self.world.getTeam(self.winningTeamId)
@@ -381,7 +407,8 @@ class UIOptions(object):
         for key in kwargs:
             if not self._isKeyValid(key):
                 raise KeyError('{!r} is not a valid UI option', key)
-        self.world.sendServerCommand(SetUIOptionsMsg(json.dumps(kwargs)))
+        self.world.sendServerCommand(SetUIOptionsMsg(
+            json.dumps(kwargs, separators=COMPACT_JSON_SEPARATORS)))
 
     def reset(self):
         self.set(
@@ -391,13 +418,7 @@ class UIOptions(object):
         )
 
     def _isKeyValid(self, key):
-        if not hasattr(self, key):
-            return False
-        if key in self.RESERVED_ATTRIBUTES:
-            return False
-        if key.startswith('_'):
-            return False
-        return True
+        return key in self._validKeys
 
     def gotSetUIOptionsMsg(self, settings):
         for key, value in settings.items():
@@ -416,6 +437,10 @@ class TrosballManager(object):
         self.trosballCooldownPlayer = None
         self.playerGotTrosballTick = None
 
+        # Zones which the trosball can capture, cached for the current map.
+        self._nonTargetZones = []
+        self._nonTargetZonesMap = None
+
     def dumpState(self):
         if not self.enabled:
             return None
@@ -512,15 +537,21 @@ class TrosballManager(object):
             self.trosballPlayer.getCurrentVelocity())
         self.trosballPlayer = None
 
+    def _getNonTargetZones(self):
+        if self._nonTargetZonesMap is not self.world.map:
+            targetZones = {
+                self.getTargetZoneDefn(team)
+                for team in self.world.teams}
+            self._nonTargetZones = [
+                zone for zone in self.world.zones
+                if zone.defn not in targetZones]
+            self._nonTargetZonesMap = self.world.map
+        return self._nonTargetZones
+
     def _updateZoneOwnership(self):
         trosballPosition = self.getPosition()
-        targetZones = {
-            self.getTargetZoneDefn(team)
-            for team in self.world.teams}
-
-        for zone in self.world.zones:
-            if zone.defn not in targetZones:
-                zone.updateByTrosballPosition(trosballPosition)
+        for zone in self._getNonTargetZones():
+            zone.updateByTrosballPosition(trosballPosition)
 
     def _maybeExplode(self):
         if self.trosballPlayer is None:
@@ -595,9 +626,9 @@ class TrosballManager(object):
         assert self.world.isServer
         player = self.trosballPlayer
         xVel, yVel = player.getCurrentVelocity()
-        angle = player.angleFacing
-        xVel += self.world.physics.trosballThrowVel * sin(angle)
-        yVel += -self.world.physics.trosballThrowVel * cos(angle)
+        sinAngle, cosAngle = player.getAngleSinCos()
+        xVel += self.world.physics.trosballThrowVel * sinAngle
+        yVel += -self.world.physics.trosballThrowVel * cosAngle
         self.trosballCooldownPlayer = player
 
         self.world.callLater(0.5, self._clearTrosballCooldown, player)
@@ -702,6 +733,9 @@ class Universe(MessageConsumer):
         self.zoneBlocks = []
 
         self.players = set()
+        self.humanPlayers = set()
+        self.zoneOfPlayer = {}
+        self._teamPlayerCounts = defaultdict(int)
         self.grenades = set()
         self.collectableCoins = {}      # coinId -> CollectableCoin
         self.deadCoins = set()
@@ -759,30 +793,57 @@ class Universe(MessageConsumer):
             3. Other zones owned by the given team.
             4. Other zones.
         '''
+        return random.choice(self.getCandidateZonesForTeam(teamId))
+
+    def getCandidateZonesForTeam(self, teamId):
+        '''
+        Returns the list of zones that selectZoneForTeam() would choose
+        between. Useful when placing many players at once, since the list only
+        changes when zone ownership changes.
+        '''
         team = self.getTeam(teamId)
         allTeamZones = [
             z for z in self.map.zones
             if z.owner is not None and z.owner.id == teamId]
         nextToEnemy = []
         nextToNeutral = []
-        for zone in list(allTeamZones):
-            enemy = neutral = False
+        for zone in allTeamZones:
+            # One enemy neighbour is enough to decide, so stop looking.
+            neutral = False
             for adj in zone.getAdjacentZones():
-                if adj.owner is None:
+                owner = adj.owner
+                if owner is None:
                     neutral = True
-                elif adj.isEnemyTeam(team):
-                    enemy = True
-            if enemy:
-                nextToEnemy.append(zone)
-            elif neutral:
-                nextToNeutral.append(zone)
-
-        return random.choice(
+                elif owner != team:
+                    nextToEnemy.append(zone)
+                    break
+            else:
+                if neutral:
+                    nextToNeutral.append(zone)
+
+        return (
             nextToEnemy
             or nextToNeutral
             or allTeamZones
             or list(self.map.zones))
 
+    def teleportPlayersToTeamZones(self):
+        '''
+        Moves every player to the centre of a zone that selectZoneForTeam()
+        could have chosen for their team.
+        '''
+        # Zone ownership does not change while players are being placed, so
+        # each team's candidate zones only need to be found once.
+        candidates = {}
+        for player in self.players:
+            teamId = player.teamId
+            try:
+                teamZones = candidates[teamId]
+            except KeyError:
+                teamZones = candidates[teamId] = (
+                    self.getCandidateZonesForTeam(teamId))
+            player.teleportToZoneCentre(random.choice(teamZones))
+
     @WorldResetMsg.handler
     def gotWorldReset(self, msg):
         if not self.isServer:
@@ -835,8 +896,24 @@ class Universe(MessageConsumer):
         # Add this player to this universe.
         self.players.add(player)
         self.playerWithId[player.id] = player
+        if not player.bot:
+            self.humanPlayers.add(player)
+        self._teamPlayerCounts[player.teamId] += 1
         self.onPlayerAdded(player)
 
+    def playerTeamChanged(self, player, oldTeam):
+        '''
+        Called by Player when its team is changed, to keep the team player
+        counts up to date.
+        '''
+        if self.playerWithId.get(player.id) is not player:
+            # Not (or no longer) a player in this universe, e.g. the local
+            # clone of a player.
+            return
+        oldTeamId = oldTeam.id if oldTeam is not None else NEUTRAL_TEAM_ID
+        self._teamPlayerCounts[oldTeamId] -= 1
+        self._teamPlayerCounts[player.teamId] += 1
+
     @PlayerHasElephantMsg.handler
     def gotElephantMsg(self, msg):
         player = self.getPlayer(msg.playerId)
@@ -846,7 +923,9 @@ class Universe(MessageConsumer):
         playerId = player.id
         player.removeFromGame()
         self.players.remove(player)
+        self.humanPlayers.discard(player)
         del self.playerWithId[player.id]
+        self._teamPlayerCounts[player.teamId] -= 1
         if player == self.playerWithElephant:
             self.returnElephantToOwner()
 
@@ -858,21 +937,29 @@ class Universe(MessageConsumer):
     def advanceEverything(self):
         '''Advance the state of the game by deltaT seconds'''
 
-        for shot in list(self.shots):
-            if shot.expired:
-                del self.shotWithId[shot.id]
-                self.onShotRemoved(shot.id)
-
-        # Update the player and shot positions.
-        advancables = (
-            self.shotWithId.values() + list(self.players) + list(self.grenades)
-            + self.collectableCoins.values())
-        advancables.extend(self.trosballManager.getAdvancables())
+        expiredShotIds = [
+            shotId for shotId, shot in self.shotWithId.iteritems()
+            if shot.expired]
+        for shotId in expiredShotIds:
+            del self.shotWithId[shotId]
+            self.onShotRemoved(shotId)
+
+        # Update the player and shot positions. Advancing a unit may add or
+        # remove others, so take a snapshot first.
+        if (self.shotWithId or self.grenades or self.collectableCoins
+                or self.trosballManager.enabled):
+            advancables = list(chain(
+                self.shotWithId.itervalues(), self.players, self.grenades,
+                self.collectableCoins.itervalues(),
+                self.trosballManager.getAdvancables()))
+        else:
+            # Common in lobbies and quiet moments: only players to move.
+            advancables = list(self.players)
         for unit in advancables:
             unit.reset()
             unit.advance()
 
-        self.updateZoneInhabitants(advancables)
+        self.updateZoneInhabitants()
         self.trosballManager.afterAdvance()
 
     def getCollectableUnits(self):
@@ -880,17 +967,30 @@ class Universe(MessageConsumer):
             yield coin
         if self.trosballManager.enabled and self.trosballManager.trosballUnit:
             yield self.trosballManager.trosballUnit
-        for unit in list(self.deadCoins):
-            yield unit
+        if self.deadCoins:
+            # Copied because collecting a coin removes it from the set.
+            for unit in list(self.deadCoins):
+                yield unit
 
-    def updateZoneInhabitants(self, advancables):
-        for zone in self.map.zones:
-            zone.clearPlayers()
-        for unit in advancables:
-            if isinstance(unit, Player):
-                zone = unit.getZone()
+    def updateZoneInhabitants(self):
+        # Most players stay in the same zone from one tick to the next, so
+        # only touch the zones of those that have moved.
+        oldZones = self.zoneOfPlayer
+        newZones = {}
+        for player in self.players:
+            zone = newZones[player] = player.getZone()
+            oldZone = oldZones.pop(player, None)
+            if zone is not oldZone:
+                if oldZone:
+                    oldZone.removePlayer(player)
                 if zone:
-                    zone.addPlayer(unit)
+                    zone.addPlayer(player)
+
+        # Anything left has been removed from the game since the last tick.
+        for player, oldZone in oldZones.iteritems():
+            if oldZone:
+                oldZone.removePlayer(player)
+        self.zoneOfPlayer = newZones
 
     def bomberExploded(self, player):
         player.killOutright(deathType=BOMBER_DEATH)
@@ -948,13 +1048,10 @@ class Universe(MessageConsumer):
     def getTeamPlayerCounts(self):
         '''
         Returns a mapping from team id to number of players currently on that
-        team.
+        team. The mapping is maintained as players are added, removed and
+        change teams, so callers must not modify it.
         '''
-        playerCounts = {}
-        for player in self.players:
-            playerCounts[player.teamId] = playerCounts.get(
-                player.teamId, 0) + 1
-        return playerCounts
+        return self._teamPlayerCounts
 
     def getTeamName(self, id):
         if id == NEUTRAL_TEAM_ID:
@@ -964,23 +1061,34 @@ class Universe(MessageConsumer):
     @FireShoxwaveMsg.handler
     def shoxwaveExplosion(self, msg):
         radius = 128
+        radiusSquared = radius * radius
         # Get the player who fired this shoxwave
         shoxPlayer = self.getPlayer(msg.playerId)
         if not shoxPlayer:
             return
         shoxPlayer.weaponDischarged()
 
+        sx, sy = shoxPlayer.pos
+
         # Loop through all the players in the game
         for player in self.players:
-            if not (player.isFriendsWith(shoxPlayer) or distance(player.pos,
-                    shoxPlayer.pos) > radius or player.dead or
-                    player.isInvulnerable() or
-                    player.phaseshift or player.turret):
-                player.zombieHit(shoxPlayer, None, SHOXWAVE_DEATH)
+            x, y = player.pos
+            dx, dy = x - sx, y - sy
+            if dx * dx + dy * dy > radiusSquared:
+                continue
+            if player.isFriendsWith(shoxPlayer):
+                continue
+            if player.dead or player.phaseshift or player.turret:
+                continue
+            if player.isInvulnerable():
+                continue
+            player.zombieHit(shoxPlayer, None, SHOXWAVE_DEATH)
 
         for shot in self.shotWithId.values():
-            if (not shot.originatingPlayer.isFriendsWith(shoxPlayer) and
-                    distance(shot.pos, shoxPlayer.pos) <= radius):
+            x, y = shot.pos
+            dx, dy = x - sx, y - sy
+            if (dx * dx + dy * dy <= radiusSquared and
+                    not shot.originatingPlayer.isFriendsWith(shoxPlayer)):
                 shot.expired = True
 
     @ShotFiredMsg.handler
@@ -1038,14 +1146,15 @@ class Universe(MessageConsumer):
 
     @UpgradeChangedMsg.handler
     def changeUpgrade(self, msg):
-        for upgradeClass in allUpgrades:
-            if upgradeClass.upgradeType == msg.upgradeType:
-                if msg.statType == 'S':
-                    upgradeClass.requiredCoins = msg.newValue
-                elif msg.statType == 'T':
-                    upgradeClass.totalTimeLimit = msg.newValue
-                elif msg.statType == 'E':
-                    upgradeClass.enabled = bool(msg.newValue)
+        upgradeClass = upgradeOfType.get(msg.upgradeType)
+        if upgradeClass not in allUpgrades:
+            return
+        if msg.statType == 'S':
+            upgradeClass.requiredCoins = msg.newValue
+        elif msg.statType == 'T':
+            upgradeClass.totalTimeLimit = msg.newValue
+        elif msg.statType == 'E':
+            upgradeClass.enabled = bool(msg.newValue)
 
     def addGrenade(self, grenade):
         self.grenades.add(grenade)
@@ -1071,9 +1180,8 @@ class Universe(MessageConsumer):
         self.resetUnits()
 
     def resetUnits(self):
+        self.teleportPlayersToTeamZones()
         for player in self.players:
-            zone = self.selectZoneForTeam(player.teamId)
-            player.teleportToZoneCentre(zone)
             player.health = 0
             player.zombieHits = 0
             player.items.clear()
@@ -1113,6 +1221,7 @@ class Universe(MessageConsumer):
     def dumpEverything(self):
         '''Returns a dict representing the settings which must be sent to
         clients that connect to this server.'''
+        now = self.getMonotonicTick()
 
         result = {
             'loading': self.loading,
@@ -1153,16 +1262,16 @@ class Universe(MessageConsumer):
                     'shooter': shot.originatingPlayer.id,
                     'time': shot.timeLeft,
                     'kind': shot.kind,
-                } for shot in self.shotWithId.values() if not shot.expired
+                } for shot in self.shotWithId.itervalues() if not shot.expired
             ],
             'coins': [
                 {
                     'id': coin.id,
-                    'createdAgo': self.getMonotonicTick() - coin.creationTick,
+                    'createdAgo': now - coin.creationTick,
                     'pos': coin.pos,
                     'xVel': coin.xVel,
                     'yVel': coin.yVel,
-                } for coin in self.collectableCoins.values()
+                } for coin in self.collectableCoins.itervalues()
             ],
             'grenades': [
                 {
@@ -1226,7 +1335,8 @@ class Universe(MessageConsumer):
             if playerId in self.playerWithId:
                 player = self.playerWithId[playerId]
             else:
-                player = Player(self, nick, team, playerId)
+                player = Player(
+                    self, nick, team, playerId, bot=playerData['bot'])
                 self.addPlayer(player)
 
             player.restore(playerData)
@@ -1234,11 +1344,11 @@ class Universe(MessageConsumer):
         self.trosballManager.restoreState(data['trosball'])
 
         for upgradeData in data['upgrades']:
-            for upgradeClass in allUpgrades:
-                if upgradeClass.upgradeType == upgradeData['type']:
-                    upgradeClass.requiredCoins = upgradeData['cost']
-                    upgradeClass.totalTimeLimit = upgradeData['time']
-                    upgradeClass.enabled = upgradeData['enabled']
+            upgradeClass = upgradeOfType.get(upgradeData['type'])
+            if upgradeClass in allUpgrades:
+                upgradeClass.requiredCoins = upgradeData['cost']
+                upgradeClass.totalTimeLimit = upgradeData['time']
+                upgradeClass.enabled = upgradeData['enabled']
 
         self.playerWithElephant = self.getPlayer(data['elephant'])
 
@@ -1340,6 +1450,7 @@ class ServerUniverse(Universe):
         self._expectedTickTime = None
         self.stillLoadingCentralPathFinding = False
         self.regions = []
+        self.rectRegionGrid = {}
         self.activeAchievementCategories = set()
 
         if __debug__ and globaldebug.enabled:
@@ -1366,6 +1477,7 @@ class ServerUniverse(Universe):
         self.deactivateStats()
 
         self.regions = []
+        self.rectRegionGrid = {}
         if self.level is not None:
             oldLevel = self.level
             self.level.tearDownLevel()
@@ -1427,9 +1539,18 @@ class ServerUniverse(Universe):
 
     def addRegion(self, region):
         self.regions.append(region)
+        if isinstance(region, RectRegion):
+            for cell in region.getGridCells():
+                self.rectRegionGrid.setdefault(cell, []).append(region)
 
     def removeRegion(self, region):
         self.regions.remove(region)
+        if isinstance(region, RectRegion):
+            for cell in region.getGridCells():
+                cellRegions = self.rectRegionGrid[cell]
+                cellRegions.remove(region)
+                if not cellRegions:
+                    del self.rectRegionGrid[cell]
 
     def pauseOrResumeGame(self):
         self.paused = not self.paused
@@ -1449,13 +1570,15 @@ class ServerUniverse(Universe):
         player.setPos(pos, 'f')
         player.sendResync(reason='')
 
-    @defer.inlineCallbacks
     def loadPathFindingData(self):
-        from trosnoth.bots.pathfinding import RunTimePathFinder
-
         if self.map.layout.pathFinder:
             # Map has not changed since last load of data
-            return
+            return defer.succeed(None)
+        return self._loadPathFindingData()
+
+    @defer.inlineCallbacks
+    def _loadPathFindingData(self):
+        from trosnoth.bots.pathfinding import RunTimePathFinder
 
         self.stillLoadingCentralPathFinding = True
         pf = self.map.layout.pathFinder = RunTimePathFinder(self.map.layout)
@@ -1485,51 +1608,76 @@ class ServerUniverse(Universe):
         self.bootTardyPlayers()
 
     def bootTardyPlayers(self):
-        for player in list(self.players):
-            if (
-                    player.resyncing and
-                    self.getMonotonicTick() > player.resyncExpiry):
-                log.warning('%s took too long to resync', player)
-                if player.agent:
-                    player.agent.messageToAgent(ChatFromServerMsg(
-                        error=True, text='You have been removed from the game '
-                        'because your connection is too slow!'))
-                self.sendServerCommand(RemovePlayerMsg(player.id))
+        now = self.getMonotonicTick()
+        # Removing a player changes self.players, so find them all first.
+        tardyPlayers = [
+            p for p in self.players if p.resyncing and now > p.resyncExpiry]
+        for player in tardyPlayers:
+            log.warning('%s took too long to resync', player)
+            if player.agent:
+                player.agent.messageToAgent(ChatFromServerMsg(
+                    error=True, text='You have been removed from the game '
+                    'because your connection is too slow!'))
+            self.sendServerCommand(RemovePlayerMsg(player.id))
 
     def checkShotCollisions(self, resolution=200):
         '''
         Performs collision checks of all shots with all nearby players.
         '''
-        buckets = defaultdict(list)
+        shots = self.shotWithId.values()
+        if not shots:
+            return
+
+        # Each player goes into one bucket, and each shot looks in the 3x3
+        # block of buckets around it.
+        buckets = {}
         for player in self.players:
             if player.dead:
                 continue
             x, y = player.pos
-            xBucket, yBucket = x // resolution, y // resolution
-            for dx in [-1, 0, 1]:
-                for dy in [-1, 0, 1]:
-                    buckets[xBucket + dx, yBucket + dy].append(player)
+            key = (x // resolution, y // resolution)
+            try:
+                buckets[key].append(player)
+            except KeyError:
+                buckets[key] = [player]
+        if not buckets:
+            return
 
-        for shot in list(self.shots):
+        for shot in shots:
             x, y = shot.pos
             xBucket, yBucket = x // resolution, y // resolution
-            hitPlayers = [
-                p for p in buckets[xBucket, yBucket]
-                if shot.checkCollision(p)]
-            if hitPlayers:
-                # If multiple players are hit in the same tick, the server
-                # randomly selects one to die.
+            # If multiple players are hit in the same tick, the server
+            # randomly selects one to die. Each hit replaces the choice so
+            # far with probability 1/hitCount, so every hit player is
+            # equally likely to be chosen.
+            hitPlayer = None
+            hitCount = 0
+            for dx, dy in NEIGHBOURING_BUCKET_OFFSETS:
+                try:
+                    bucket = buckets[xBucket + dx, yBucket + dy]
+                except KeyError:
+                    continue
+                for player in bucket:
+                    if shot.checkCollision(player):
+                        hitCount += 1
+                        if (hitCount == 1 or
+                                random.randrange(hitCount) == 0):
+                            hitPlayer = player
+            if hitPlayer is not None:
                 self.sendServerCommand(
-                    ShotHitPlayerMsg(random.choice(hitPlayers).id, shot.id))
+                    ShotHitPlayerMsg(hitPlayer.id, shot.id))
 
     def updateCollectableCoins(self):
         try:
+            # A coin expires once it was created at or before this tick.
+            expiryTick = self.getMonotonicTick() - (
+                COLLECTABLE_COIN_LIFETIME // TICK_PERIOD)
             for coin in self.collectableCoins.values():
-                endTick = coin.creationTick + (
-                        COLLECTABLE_COIN_LIFETIME // TICK_PERIOD)
-                if self.getMonotonicTick() >= endTick:
+                if coin.creationTick <= expiryTick:
                     coin.removeDueToTime()
 
+            if not self.deadCoins:
+                return
             for unit in list(self.deadCoins):
                 unit.beat()
                 if not unit.history:
@@ -1647,7 +1795,7 @@ class ServerUniverse(Universe):
         if loading or len(self.players) == 0 or self.paused:
             return
 
-        tickId = self._lastTickId = (self._lastTickId + 1) % TICK_LIMIT
+        tickId = self._lastTickId = (self._lastTickId + 1) & TICK_ID_MASK
         self.game.sendServerCommand(TickMsg(tickId))
         self.onServerTickComplete()
 
@@ -1676,8 +1824,24 @@ class ServerUniverse(Universe):
     def tickReceived(self, msg):
         super(ServerUniverse, self).tickReceived(msg)
 
+        # Rectangular regions are looked up by grid cell so that each player
+        # is only checked against the regions near it.
+        rectRegionPlayers = {}
+        if self.rectRegionGrid:
+            grid = self.rectRegionGrid
+            for player in self.players:
+                x, y = player.pos
+                cell = (x // REGION_GRID_CELL_SIZE, y // REGION_GRID_CELL_SIZE)
+                for region in grid.get(cell, ()):
+                    if region.check(player):
+                        rectRegionPlayers.setdefault(region, set()).add(
+                            player)
+
         for region in self.regions:
-            region.tick()
+            if isinstance(region, RectRegion):
+                region.updatePlayers(rectRegionPlayers.get(region, set()))
+            else:
+                region.tick()
 
 
 class Region(object):
@@ -1695,7 +1859,14 @@ class Region(object):
         pass
 
     def tick(self):
-        players = set(p for p in self.world.players if self.check(p))
+        self.updatePlayers(
+            set(p for p in self.world.players if self.check(p)))
+
+    def updatePlayers(self, players):
+        '''
+        Fires onEnter and onExit based on the given set of players that are
+        now in this region.
+        '''
         for p in players - self.players:
             self.onEnter(p)
         for p in self.players - players:
@@ -1714,8 +1885,25 @@ class RectRegion(Region):
             self.rect.left += zoneDef.pos[0]
             self.rect.top += zoneDef.pos[1]
 
+        # Regions are checked against every player on every tick, so keep
+        # plain copies of the edges rather than going through the Rect.
+        self.left, self.top = self.rect.topleft
+        self.right, self.bottom = self.rect.bottomright
+
     def check(self, player):
-        return self.rect.collidepoint(player.pos)
+        x, y = player.pos
+        return self.left <= x < self.right and self.top <= y < self.bottom
+
+    def getGridCells(self):
+        '''
+        Returns the cells of the server universe's region grid that this
+        region overlaps.
+        '''
+        size = REGION_GRID_CELL_SIZE
+        return [
+            (cx, cy)
+            for cx in xrange(self.left // size, (self.right - 1) // size + 1)
+            for cy in xrange(self.top // size, (self.bottom - 1) // size + 1)]
 
     def debug_draw(self, viewManager, screen):
         from trosnoth.trosnothgui.ingame.utils import mapPosToScreen
@@ -1742,10 +1930,23 @@ class PlayerProximityRegion(Region):
         super(PlayerProximityRegion, self).__init__(world)
         self.player = player
         self.distance = dist
+        self.distanceSquared = dist * dist
+
+    def tick(self):
+        cx, cy = self.player.pos
+        limit = self.distanceSquared
+        players = set()
+        for p in self.world.players:
+            x, y = p.pos
+            dx, dy = x - cx, y - cy
+            if dx * dx + dy * dy <= limit:
+                players.add(p)
+        self.updatePlayers(players)
 
     def check(self, player):
-        d = distance(player.pos, self.player.pos)
-        return d <= self.distance
+        return (
+            distanceSquared(player.pos, self.player.pos) <=
+            self.distanceSquared)
 
 
 class ZoneRegion(Region):
@@ -1753,5 +1954,10 @@ class ZoneRegion(Region):
         super(ZoneRegion, self).__init__(zone.world)
         self.zone = zone
 
+    def tick(self):
+        # The zone already tracks who is inside it, but is only brought up to
+        # date during the advance, so leave out anyone removed since then.
+        self.updatePlayers(self.zone.players & self.world.players)
+
     def check(self, player):
         return player in self.zone.players
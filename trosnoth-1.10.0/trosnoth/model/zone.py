@@ -11,6 +11,8 @@ from trosnoth.utils import math
 
 log = logging.getLogger('zone')
 
+ZONE_CAP_DISTANCE_SQUARED = ZONE_CAP_DISTANCE ** 2
+
 
 class ZoneDef(object):
     '''Stores static information about the zone.
@@ -56,6 +58,7 @@ class DynamicZoneLogic(object):
         self.id = zoneDef.id
         self.world = universe
         self.adjacentZonesCache = None
+        self.unblockedNeighboursCache = None
 
         # Subclasses may initialise these differently
         self.owner = None
@@ -104,8 +107,9 @@ class DynamicZoneLogic(object):
                 self.world.onZoneStateChanged(self)
 
     def playerIsWithinTaggingDistance(self, player):
-        distance = math.distance(self.defn.pos, player.pos)
-        return distance < ZONE_CAP_DISTANCE
+        return (
+            math.distanceSquared(self.defn.pos, player.pos) <
+            ZONE_CAP_DISTANCE_SQUARED)
 
     def getContiguousZones(self, ownerGetter=None):
         '''
@@ -295,8 +299,12 @@ class DynamicZoneLogic(object):
         Iterates through ZoneStates adjacent to this one which are not blocked
         off.
         '''
-        for adjZoneDef in self.world.layout.getUnblockedNeighbours(self.defn):
-            yield self.world.zoneWithDef[adjZoneDef]
+        if self.unblockedNeighboursCache is None:
+            self.unblockedNeighboursCache = tuple(
+                self.world.zoneWithDef[adjZoneDef] for adjZoneDef in
+                    self.world.layout.getUnblockedNeighbours(self.defn)
+            )
+        return iter(self.unblockedNeighboursCache)
 
     def adjacentToAnotherZoneOwnedBy(self, team):
         '''
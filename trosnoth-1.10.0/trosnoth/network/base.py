@@ -13,6 +13,10 @@ log = logging.getLogger(__name__)
 
 AGENT_REQUEST_ID_LIMIT = (1 << 16)
 
+# Agent ids are encoded on every targeted message and decoded on every
+# request, so the format is only compiled once.
+AGENT_ID_STRUCT = struct.Struct('!H')
+
 CLIENT_CONNECT_AGENT = 'c'
 CLIENT_DISCONNECT_AGENT = 'd'
 CLIENT_REQUEST = 'm'
@@ -182,14 +186,14 @@ class MsgServerProtocol(Int32StringReceiver, Node):
         Takes an agentId in the form given by our hub and converts it to a form
         the network can understand.
         '''
-        return struct.pack('!H', agentId)
+        return AGENT_ID_STRUCT.pack(agentId)
 
     def decodeAgentId(self, agentId):
         '''
         Takes an agentId in the form given by the network and converts it into
         a form our hub will understand.
         '''
-        return struct.unpack('!H', agentId)[0]
+        return AGENT_ID_STRUCT.unpack(agentId)[0]
 
     def gotServerCommand(self, msg):
         msg.tracePoint(self, 'gotServerCommand')
@@ -198,7 +202,8 @@ class MsgServerProtocol(Int32StringReceiver, Node):
     def gotMessageToAgent(self, agentId, msg):
         msg.tracePoint(self, 'gotMessageToAgent')
         self.sendString(
-            SERVER_TARGETED_MESSAGE + struct.pack('!H', agentId) + msg.pack())
+            SERVER_TARGETED_MESSAGE + AGENT_ID_STRUCT.pack(agentId) +
+            msg.pack())
 
     def agentDisconnected(self, agentId):
         self.sendString(SERVER_DISCONNECTED_AGENT + agentId)
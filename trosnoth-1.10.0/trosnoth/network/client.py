@@ -10,7 +10,8 @@ from trosnoth.messages import (
     CannotBuyUpgradeMsg,
     SetTeamNameMsg, SetGameModeMsg, ShotFiredMsg, RespawnMsg,
     PlayerUpdateMsg, AwardPlayerCoinMsg, ChatFromServerMsg, AddPlayerMsg,
-    SetAgentPlayerMsg, UpdatePlayerStateMsg, AimPlayerAtMsg, RemovePlayerMsg,
+    SetAgentPlayerMsg, UpdatePlayerStateMsg, UpdatePlayerStatesMsg,
+    AimPlayerAtMsg, RemovePlayerMsg,
     CannotJoinMsg, InitClientMsg, DelayUpdatedMsg, ShotHitPlayerMsg,
     ZoneStateMsg, TickMsg, AchievementUnlockedMsg, WorldResetMsg,
     PlayerIsReadyMsg, PreferredTeamSelectedMsg, SetPreferredDurationMsg,
@@ -42,6 +43,7 @@ clientMsgs = netmsg.MessageCollection(
     SetPlayerTeamMsg,
     RespawnMsg,
     UpdatePlayerStateMsg,
+    UpdatePlayerStatesMsg,
     AimPlayerAtMsg,
     SetTeamNameMsg,
     SetGameModeMsg,
@@ -19,6 +19,6 @@ multicastPort = 5253
 
 multicastGroup = '224.0.0.234'
 
-clientVersion = 'client.v1.10.0a1+'
-serverVersion = 'server.v1.10.0a1+'
-validServerVersions = {'server.v1.10.0a1+'}
+clientVersion = 'client.v1.10.0a2+'
+serverVersion = 'server.v1.10.0a2+'
+validServerVersions = {'server.v1.10.0a2+'}
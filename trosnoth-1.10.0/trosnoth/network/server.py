@@ -30,7 +30,7 @@ from trosnoth.messages import (
     RespawnRequestMsg, JoinRequestMsg, UpdatePlayerStateMsg, AimPlayerAtMsg,
     PlayerIsReadyMsg, SetPreferredDurationMsg, SetPreferredTeamMsg,
     SetPreferredSizeMsg, RemovePlayerMsg, ChangeNicknameMsg, CheckSyncMsg,
-    ThrowTrosballMsg, PlayerHasUpgradeMsg,
+    ThrowTrosballMsg, PlayerHasUpgradeMsg, UpdatePlayerStatesMsg,
 )
 from trosnoth.utils import netmsg
 from trosnoth.utils.message import UnhandledMessage
@@ -42,6 +42,7 @@ log = logging.getLogger('server')
 serverMsgs = netmsg.MessageCollection(
     ShootMsg,
     UpdatePlayerStateMsg,
+    UpdatePlayerStatesMsg,
     AimPlayerAtMsg,
     BuyUpgradeMsg,
     ThrowTrosballMsg,
@@ -0,0 +1,37 @@
+from collections import deque
+
+from mock import patch
+
+from trosnoth.model.agent import ConcreteAgent
+
+
+def runScheduledCalls(reactor):
+    calls = reactor.callLater.call_args_list
+    reactor.callLater.reset_mock()
+    for args, kwargs in calls:
+        delay, fn = args[:2]
+        fn(*args[2:], **kwargs)
+
+
+def test_failed_request_does_not_block_later_requests():
+    received = []
+
+    def agentRequest(agent, msg):
+        if msg == 'bad':
+            raise ValueError(msg)
+        received.append(msg)
+
+    agent = ConcreteAgent.__new__(ConcreteAgent)
+    agent.pendingRequests = deque()
+    agent._agentRequest = agentRequest
+
+    with patch('trosnoth.model.agent.reactor') as reactor:
+        agent._queueRequest('bad')
+        agent._queueRequest('first')
+        runScheduledCalls(reactor)
+
+        agent._queueRequest('second')
+        runScheduledCalls(reactor)
+
+    assert received == ['first', 'second']
+    assert not agent.pendingRequests
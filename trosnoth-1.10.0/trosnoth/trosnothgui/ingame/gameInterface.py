@@ -144,6 +144,11 @@ class GameInterface(framework.CompoundElement, ConcreteAgent):
             return
         super(GameInterface, self).sendRequest(msg)
 
+    def sendSyncCheck(self, msg):
+        if not self.ready:
+            return
+        super(GameInterface, self).sendSyncCheck(msg)
+
     def worldReset(self, *args, **kwarsg):
         self.winnerMsg.hide()
         if self.ready and self.joinController:
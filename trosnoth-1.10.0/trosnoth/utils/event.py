@@ -1,3 +1,4 @@
+from collections import deque
 import functools
 import inspect
 import logging
@@ -60,13 +61,15 @@ class Event(object):
     __call__ = execute
 
     @defer.inlineCallbacks
-    def wait(self):
+    def wait(self, condition=None):
         '''
         Returns a Deferred that waits for the given event to fire,
         and returns a dict of the parameters received by the call. This
         requires that the event was initialised with a signature.
+
+        If condition is given, see waitForEvents().
         '''
-        event, result = yield waitForEvents([self])
+        event, result = yield waitForEvents([self], condition)
         defer.returnValue(result)
 
 
@@ -113,11 +116,15 @@ class WeakMethod(object):
         self.obj = None
 
 
-def waitForEvents(events):
+def waitForEvents(events, condition=None):
     '''
     Utility function that waits for the first of a number of given events to
     trigger. Returns (event, args), indicating which event fired, and the
     arguments that it fired with.
+
+    If condition is given, it is called as condition(event, args) each time
+    one of the events fires, and the wait only completes once it returns
+    True.
     '''
     d = defer.Deferred()
 
@@ -125,27 +132,13 @@ def waitForEvents(events):
 
     def trigger(_event, *args, **kwargs):
         event = _event  # We do not want to collide with a keyword arg
-        for k, v in listeners.items():
-            k.removeListener(v)
+        result = _getEventArgs(event, args, kwargs)
 
-        if event.signature is None:
-            raise TypeError('to use wait(), event must have a signature')
-
-        args = list(args)
-        result = kwargs
-        for i, argName in enumerate(event.signature):
-            if args:
-                if argName in result:
-                    raise TypeError(
-                        'event got multiple values for keyword argument '
-                        '{!r}'.format(argName))
-                result[argName] = args.pop(0)
-            elif argName not in result:
-                raise TypeError('event expected argument {!r}'.format(
-                    argName))
-        if args:
-            raise TypeError('extra arguments provided to event')
+        if condition is not None and not condition(event, result):
+            return
 
+        for k, v in listeners.items():
+            k.removeListener(v)
         d.callback((event, result))
 
     for event in events:
@@ -153,3 +146,74 @@ def waitForEvents(events):
         event.addListener(listeners[event])
 
     return d
+
+
+def _getEventArgs(event, args, kwargs):
+    '''
+    Returns a dict of the arguments that the given event fired with, keyed
+    by the names in the event's signature.
+    '''
+    if event.signature is None:
+        raise TypeError('to use wait(), event must have a signature')
+
+    args = list(args)
+    result = kwargs
+    for i, argName in enumerate(event.signature):
+        if args:
+            if argName in result:
+                raise TypeError(
+                    'event got multiple values for keyword argument '
+                    '{!r}'.format(argName))
+            result[argName] = args.pop(0)
+        elif argName not in result:
+            raise TypeError('event expected argument {!r}'.format(
+                argName))
+    if args:
+        raise TypeError('extra arguments provided to event')
+    return result
+
+
+class EventQueue(object):
+    '''
+    Listens to a number of events for as long as it is open, and queues up
+    (event, args) pairs as they fire. This is cheaper than calling
+    waitForEvents() over and over in a loop, because the listeners are only
+    registered once.
+    '''
+
+    def __init__(self, events):
+        self.pending = deque()
+        self.waiting = deque()
+        self.listeners = {}
+        for event in events:
+            self.listeners[event] = functools.partial(self._trigger, event)
+            event.addListener(self.listeners[event])
+
+    def _trigger(self, _event, *args, **kwargs):
+        item = (_event, _getEventArgs(_event, args, kwargs))
+        if self.waiting:
+            self.waiting.popleft().callback(item)
+        else:
+            self.pending.append(item)
+
+    def get(self):
+        '''
+        Returns a Deferred that fires with the next (event, args) pair.
+        '''
+        if self.pending:
+            return defer.succeed(self.pending.popleft())
+        d = defer.Deferred()
+        self.waiting.append(d)
+        return d
+
+    def clear(self):
+        '''
+        Discards any events that have fired but not yet been collected.
+        '''
+        self.pending.clear()
+
+    def close(self):
+        for event, listener in self.listeners.items():
+            event.removeListener(listener)
+        self.listeners = {}
+        self.pending.clear()
@@ -20,6 +20,15 @@ def distance(pt1, pt2):
     return ((pt1[0] - pt2[0]) ** 2 + (pt1[1] - pt2[1]) ** 2) ** 0.5
 
 
+def distanceSquared(pt1, pt2):
+    '''
+    Cheaper than distance() when only comparing against a fixed range.
+    '''
+    dx = pt1[0] - pt2[0]
+    dy = pt1[1] - pt2[1]
+    return dx * dx + dy * dy
+
+
 def fadeValues(val1, val2, interval):
     return val2 * interval + val1 * (1 - interval)
 
@@ -87,6 +87,33 @@ def makeHandler(method, message):
     method._handles_msgs.append(message)
 
 
+# Maps each MessageConsumer subclass to a list of (message, method name)
+# pairs, so that the class only needs to be searched for handlers once.
+_handlerNamesByClass = {}
+
+
+def getHandlerNames(consumerClass):
+    try:
+        return _handlerNamesByClass[consumerClass]
+    except KeyError:
+        pass
+
+    result = []
+    seen = set()
+    for k in dir(consumerClass):
+        v = getattr(consumerClass, k, None)
+        if not isHandler(v):
+            continue
+        for message in v._handles_msgs:
+            if message in seen:
+                raise KeyError('handler already defined for %s' % (message,))
+            seen.add(message)
+            result.append((message, k))
+
+    _handlerNamesByClass[consumerClass] = result
+    return result
+
+
 class MessageConsumer(object):
     '''
     Base class for any class that may handle different messages based on the
@@ -96,20 +123,9 @@ class MessageConsumer(object):
     def __init__(self, *args, **kwargs):
         super(MessageConsumer, self).__init__(*args, **kwargs)
 
-        self.messageDispatchers = {}
-        for k in dir(self):
-            try:
-                v = getattr(self, k)
-            except AttributeError:
-                # This might be a property which relies on values not yet set
-                continue
-            if not isHandler(v):
-                continue
-            for message in v._handles_msgs:
-                if message in self.messageDispatchers:
-                    raise KeyError(
-                        'handler already defined for %s' % (message,))
-                self.messageDispatchers[message] = v
+        self.messageDispatchers = dict(
+            (message, getattr(self, name))
+            for message, name in getHandlerNames(type(self)))
 
     def consumeMsg(self, msg):
         '''
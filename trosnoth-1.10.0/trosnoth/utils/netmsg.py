@@ -84,6 +84,14 @@ class NetworkMessageClass(type):
             if not hasattr(result, 'fields'):
                 raise AttributeError('fields attribute required')
 
+        # Compile the fixed-length part of the packspec once, rather than
+        # every time a message is packed or unpacked.
+        packspec = getattr(result, 'packspec', None)
+        if packspec is not None:
+            if packspec.endswith('*'):
+                packspec = packspec[:-1]
+            result._struct = struct.Struct('!' + packspec)
+
         return result
 
 
@@ -190,14 +198,12 @@ class NetworkMessage(Message):
             if not isinstance(values[-1], str):
                 raise TypeError('%s field must be string' % (self.fields[-1]))
             suffix = values.pop()
-            packspec = self.packspec[:-1]
         else:
             suffix = ''
-            packspec = self.packspec
 
         # Perform the packing.
         try:
-            result = struct.pack('!' + packspec, *values)
+            result = self._struct.pack(*values)
         except:
             raise Exception('%s message couldn\'t pack string %s' % (
                 self.idString, str(values)))
@@ -210,23 +216,21 @@ class NetworkMessage(Message):
         Called by buildMessage() to build an instance of this class from a
         network message string.
         '''
-        packspec = '!' + cls.packspec
-        hasCoin = packspec.endswith('*')
+        compiled = cls._struct
+        size = compiled.size
+        hasCoin = cls.packspec.endswith('*')
         if hasCoin:
-            packspec = packspec[:-1]
-            size = struct.calcsize(packspec)
             suffix = source[size:]
             source = source[:size]
         else:
             # Verify size.
-            size = struct.calcsize(packspec)
             if len(source) != size:
                 raise MessageContentsError(
                     'bad message length for %s' % cls.__name__)
 
         # Do the actual unpacking.
         try:
-            values = struct.unpack(packspec, source)
+            values = compiled.unpack(source)
         except struct.error, E:
             raise MessageContentsError(
                 'bad %s string: %s' % (cls.__name__, E.args[0]))